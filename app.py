@@ -1,356 +1,507 @@
-import streamlit as st
-import pandas as pd
-import json
-import file_forge as forge
-from io import StringIO, BytesIO
-
-# ------------------------ PAGE CONFIG ------------------------
-st.set_page_config(
-    page_title="⚔️ The File Forge 4.0",
-    page_icon="⚔️",
-    layout="wide",
-)
-
-# ------------------------ GLOBAL STYLING ------------------------
-st.markdown(
-    """
-    <style>
-    /* Main background */
-    .stApp {
-        background: radial-gradient(circle at top left, #102316 0, #050908 45%, #020403 100%);
-        color: #E5F7E7;
-        font-family: "Inter", system-ui, -apple-system, BlinkMacSystemFont, sans-serif;
-    }
-
-    /* Sidebar */
-    section[data-testid="stSidebar"] {
-        background: linear-gradient(180deg, #07140B 0%, #040806 100%);
-        border-right: 1px solid #1C3B22;
-    }
-    section[data-testid="stSidebar"] * {
-        color: #E5F7E7 !important;
-    }
-
-    /* Titles */
-    h1, h2, h3 {
-        color: #D5FFE0 !important;
-        text-shadow: 0 0 12px rgba(0, 255, 140, 0.25);
-    }
-
-    /* Card-like markdown containers */
-    div[data-testid="stMarkdownContainer"] {
-        border-radius: 12px;
-    }
-
-    /* General card wrapper using blocks */
-    .forge-card {
-        background: rgba(5, 20, 10, 0.9);
-        border-radius: 14px;
-        padding: 18px 20px;
-        border: 1px solid rgba(46, 204, 113, 0.25);
-        box-shadow:
-            0 0 18px rgba(0, 0, 0, 0.9),
-            0 0 24px rgba(46, 204, 113, 0.08);
-        backdrop-filter: blur(8px);
-        transition: transform 0.18s ease-out,
-                    box-shadow 0.18s ease-out,
-                    border-color 0.18s ease-out;
-    }
-
-    .forge-card:hover {
-        transform: translateY(-3px);
-        box-shadow:
-            0 0 22px rgba(0, 0, 0, 1),
-            0 0 26px rgba(46, 204, 113, 0.18);
-        border-color: rgba(46, 204, 113, 0.5);
-    }
-
-    /* Buttons */
-    button[kind="primary"],
-    .stButton > button {
-        background: linear-gradient(90deg, #16A34A, #22C55E);
-        color: #F0FFF4 !important;
-        font-weight: 600;
-        border-radius: 999px !important;
-        border: 1px solid #4ADE80;
-        box-shadow: 0 0 12px rgba(34, 197, 94, 0.45);
-        transition: transform 0.15s ease-out,
-                    box-shadow 0.15s ease-out,
-                    filter 0.15s ease-out;
-    }
-
-    .stButton > button:hover {
-        transform: translateY(-1px) scale(1.01);
-        filter: brightness(1.05);
-        box-shadow: 0 0 18px rgba(34, 197, 94, 0.7);
-    }
-
-    .stButton > button:active {
-        transform: translateY(0) scale(0.99);
-        box-shadow: 0 0 6px rgba(34, 197, 94, 0.45);
-    }
-
-    /* Inputs */
-    .stTextInput > div > div > input,
-    .stTextArea textarea,
-    .stSelectbox div[data-baseweb="select"] > div {
-        background: rgba(2, 10, 5, 0.9);
-        color: #E5F7E7 !important;
-        border-radius: 10px;
-        border: 1px solid #14532D;
-    }
-
-    .stTextInput > div > div > input:focus,
-    .stTextArea textarea:focus,
-    .stSelectbox div[data-baseweb="select"]:focus-within {
-        border-color: #22C55E !important;
-        box-shadow: 0 0 0 1px #16A34A;
-    }
-
-    /* Upload widget */
-    .stFileUploader {
-        background: rgba(3, 12, 6, 0.9);
-        border-radius: 12px;
-        padding: 10px 10px 6px 10px;
-        border: 1px dashed rgba(34, 197, 94, 0.45);
-    }
-
-    /* Subtle fade-in animation for main container */
-    .forge-fade-in {
-        animation: forgeFade 0.45s ease-out;
-    }
-
-    @keyframes forgeFade {
-        from {
-            opacity: 0;
-            transform: translateY(6px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-
-    /* Horizontal rule */
-    hr {
-        border-color: rgba(21, 128, 61, 0.4);
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
-
-# ------------------------ SIDEBAR ------------------------
-st.sidebar.title("⚔️ The File Forge")
-st.sidebar.caption("Version 4.0 • File handling lab")
-
-page = st.sidebar.radio(
-    "Navigate",
-    ["🔨 Forge (Create)", "📜 Manage Files", "⚗️ Convert Files"],
-)
-
-def list_files():
-    return forge.list_all_files()
-
-# ------------------------ PAGE 1: CREATE ------------------------
-if page == "🔨 Forge (Create)":
-    st.markdown('<div class="forge-card forge-fade-in">', unsafe_allow_html=True)
-    st.title("🔨 Forge a New File")
-    st.write("Craft fresh **text**, **CSV**, or **JSON** files directly in the forge.")
-
-    col1, col2 = st.columns(2)
-
-    with col1:
-        filename = st.text_input("Filename (without extension)", placeholder="example: heroes")
-
-    with col2:
-        ftype = st.selectbox("File Type", ["Text (.txt)", "CSV (.csv)", "JSON (.json)"])
-
-    content = st.text_area("Initial Content", height=200, placeholder="Start writing your content here...")
-
-    create_col, _ = st.columns([1, 3])
-    with create_col:
-        if st.button("🔥 Create File"):
-            msg, path = forge.create_file(filename, content, ftype)
-            if "Created" in msg:
-                st.success(msg)
-            else:
-                st.error(msg)
-
-    st.markdown('</div>', unsafe_allow_html=True)
-
-# ------------------------ PAGE 2: MANAGE ------------------------
-elif page == "📜 Manage Files":
-    st.markdown('<div class="forge-card forge-fade-in">', unsafe_allow_html=True)
-    st.title("📜 Manage Files")
-
-    tab1, tab2 = st.tabs(["📂 Existing Forge Files", "💻 Upload From Device"])
-
-    # ---- Tab 1: Existing files handled by file_forge ----
-    with tab1:
-        files = list_files()
-
-        if not files:
-            st.warning("No files found in the forge directory. Create a file first.")
-        else:
-            selected = st.selectbox("Choose a file from the forge", files)
-
-            st.subheader("📖 Read File")
-            if st.button("Load Forge File"):
-                msg, data = forge.read_file(selected)
-                st.info(msg)
-
-                if isinstance(data, pd.DataFrame):
-                    st.dataframe(data, use_container_width=True)
-                elif isinstance(data, (dict, list)):
-                    st.json(data)
-                else:
-                    st.text_area("File Content", data, height=200)
-
-            st.markdown("---")
-            st.subheader("➕ Append to File")
-
-            append_text = st.text_area("Append Content", height=120)
-            if st.button("Add Content"):
-                msg = forge.append_to_file(selected, append_text)
-                if "Appended" in msg:
-                    st.success(msg)
-                else:
-                    st.error(msg)
-
-            st.markdown("---")
-            st.subheader("🗑️ Delete File")
-
-            if st.button("Delete File", type="primary"):
-                msg = forge.delete_file(selected)
-                if "Deleted" in msg:
-                    st.success(msg)
-                else:
-                    st.error(msg)
-
-    # ---- Tab 2: Work with uploaded files (read-only / append logical) ----
-    with tab2:
-        st.subheader("📥 Read a Local File")
-        uploaded = st.file_uploader(
-            "Upload a text, CSV, or JSON file from your system",
-            type=["txt", "csv", "json"],
-        )
-
-        if uploaded is not None:
-            ext = uploaded.name.split(".")[-1].lower()
-            st.caption(f"Detected file: **{uploaded.name}**")
-
-            if ext == "csv":
-                try:
-                    df = pd.read_csv(uploaded)
-                    st.dataframe(df, use_container_width=True)
-                except Exception as e:
-                    st.error(f"Could not read CSV: {e}")
-            elif ext == "json":
-                try:
-                    data = json.load(uploaded)
-                    st.json(data)
-                except Exception as e:
-                    st.error(f"Could not read JSON: {e}")
-            else:  # txt or others treated as text
-                string_data = uploaded.read().decode("utf-8", errors="ignore")
-                st.text_area("File Content", string_data, height=220)
-
-    st.markdown('</div>', unsafe_allow_html=True)
-
-# ------------------------ PAGE 3: CONVERT ------------------------
-elif page == "⚗️ Convert Files":
-    st.markdown('<div class="forge-card forge-fade-in">', unsafe_allow_html=True)
-    st.title("⚗️ File Conversion")
-    st.write("Convert **CSV ↔ JSON** effortlessly, either from forge files or from your own device.")
-
-    tab1, tab2 = st.tabs(["📂 Forge Files", "💻 Upload & Convert"])
-
-    # ---- Tab 1: Convert existing forge files with file_forge ----
-    with tab1:
-        files = list_files()
-
-        if not files:
-            st.warning("No files to convert in the forge.")
-        else:
-            selected = st.selectbox("Select a CSV or JSON file from forge", files)
-
-            if st.button("⚡ Convert Forge File"):
-                msg, output_path = forge.convert_csv_json(selected)
-                if "Converted" in msg:
-                    st.success(msg)
-
-                    with open(output_path, "rb") as f:
-                        st.download_button(
-                            label="⬇️ Download Converted File",
-                            data=f,
-                            file_name=output_path.split("/")[-1],
-                            mime="application/octet-stream",
-                        )
-                else:
-                    st.error(msg)
-
-    # ---- Tab 2: Upload file from device and convert ----
-    with tab2:
-        st.subheader("💻 Upload CSV or JSON to Convert")
-        uploaded_conv = st.file_uploader(
-            "Upload a CSV or JSON file",
-            type=["csv", "json"],
-            key="upload_convert",
-        )
-
-        direction = st.radio(
-            "Conversion Direction",
-            ["CSV → JSON", "JSON → CSV"],
-            horizontal=True,
-        )
-
-        if uploaded_conv is not None:
-            st.caption(f"Working with **{uploaded_conv.name}**")
-
-            if st.button("⚡ Convert Uploaded File"):
-                ext = uploaded_conv.name.split(".")[-1].lower()
-
-                # CSV -> JSON
-                if direction == "CSV → JSON":
-                    try:
-                        df = pd.read_csv(uploaded_conv)
-                        json_str = df.to_json(orient="records", indent=2)
-                        # Provide as downloadable file
-                        b = BytesIO()
-                        b.write(json_str.encode("utf-8"))
-                        b.seek(0)
-                        st.download_button(
-                            label="⬇️ Download JSON",
-                            data=b,
-                            file_name=uploaded_conv.name.rsplit(".", 1)[0] + ".json",
-                            mime="application/json",
-                        )
-                        st.success("Conversion successful! JSON ready to download.")
-                    except Exception as e:
-                        st.error(f"Error converting CSV to JSON: {e}")
-
-                # JSON -> CSV
-                else:
-                    try:
-                        # Load JSON
-                        raw = uploaded_conv.read().decode("utf-8", errors="ignore")
-                        data = json.loads(raw)
-                        df = pd.json_normalize(data)
-                        csv_buffer = StringIO()
-                        df.to_csv(csv_buffer, index=False)
-                        csv_bytes = BytesIO()
-                        csv_bytes.write(csv_buffer.getvalue().encode("utf-8"))
-                        csv_bytes.seek(0)
-
-                        st.download_button(
-                            label="⬇️ Download CSV",
-                            data=csv_bytes,
-                            file_name=uploaded_conv.name.rsplit(".", 1)[0] + ".csv",
-                            mime="text/csv",
-                        )
-                        st.success("Conversion successful! CSV ready to download.")
-                    except Exception as e:
-                        st.error(f"Error converting JSON to CSV: {e}")
-
-    st.markdown('</div>', unsafe_allow_html=True)
+import os
+import streamlit as st
+import file_forge as forge
+import forge_style
+from file_forge import pd  # lazy: pandas loads on first use
+
+# ------------------------ PAGE CONFIG ------------------------
+st.set_page_config(
+    page_title="⚔️ The File Forge 4.0",
+    page_icon="⚔️",
+    layout="wide",
+)
+
+# ------------------------ FORGE ROOT ------------------------
+@st.cache_resource
+def init_forge():
+    return forge.init_forge()
+
+init_forge()
+
+# ------------------------ GLOBAL STYLING ------------------------
+st.markdown(forge_style.FORGE_CSS, unsafe_allow_html=True)
+
+# ------------------------ SIDEBAR ------------------------
+st.sidebar.title("⚔️ The File Forge")
+st.sidebar.caption("Version 4.0 • File handling lab")
+
+page = st.sidebar.radio(
+    "Navigate",
+    ["🔨 Forge (Create)", "📜 Manage Files", "⚗️ Convert Files", "📈 Performance"],
+)
+
+with st.sidebar.expander("🧠 Read Cache"):
+    budget_mb = st.number_input(
+        "Budget (MB)", min_value=0, value=forge.READ_CACHE_BYTES // (1024 * 1024), step=64
+    )
+    if budget_mb * 1024 * 1024 != forge.READ_CACHE_BYTES:
+        forge.set_read_cache_budget(budget_mb * 1024 * 1024)
+    stats = forge.read_cache_stats()
+    lookups = stats["hits"] + stats["misses"]
+    st.caption(
+        f"{stats['entries']} entries • {forge.human_size(stats['bytes'])} used\n\n"
+        f"Hits {stats['hits']:,} • Misses {stats['misses']:,} • Evictions {stats['evictions']:,}"
+        + (f" • Hit rate {stats['hits'] / lookups:.0%}" if lookups else "")
+    )
+    if st.button("Clear Cache"):
+        forge.clear_read_cache()
+
+with st.sidebar.expander("♻️ Conversion Cache"):
+    stats = forge.conversion_cache_stats()
+    st.caption(
+        f"{stats['entries']} outputs • {forge.human_size(stats['bytes'])} of "
+        f"{forge.human_size(forge.CONVERSION_CACHE_BYTES)}\n\n"
+        f"Hits {stats['hits']:,} • Misses {stats['misses']:,} • Evictions {stats['evictions']:,}"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Clear Outputs"):
+            forge.clear_conversion_cache()
+            st.rerun()
+    with col2:
+        if st.button("Deduplicate"):
+            st.caption(forge.dedup_forge()[0])
+
+with st.sidebar.expander("🔬 Profiling"):
+    profiling = st.toggle("Profile slow operations", value=forge.PROFILING["enabled"])
+    min_ms = st.number_input("Keep calls slower than (ms)", min_value=0,
+                             value=int(forge.PROFILING["min_seconds"] * 1000), step=100)
+    min_mb = st.number_input("…or allocating more than (MB)", min_value=0,
+                             value=forge.PROFILING["min_bytes"] // (1024 * 1024), step=10)
+    forge.set_profiling(profiling, min_seconds=min_ms / 1000, min_bytes=int(min_mb) * 1024 * 1024)
+    st.caption("Reports are listed on the Performance page.")
+
+FILE_PICKER_LIMIT = 200
+
+def pick_file(label, key, empty_message):
+    """Filter/sort controls plus a selectbox fed at most FILE_PICKER_LIMIT files."""
+    if forge.count_files() == 0:
+        st.warning(empty_message)
+        return None
+
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        pattern = st.text_input("Filter files", key=f"{key}_filter", placeholder="e.g. *.csv or report")
+    with col2:
+        sort_by = st.selectbox("Sort by", ["name", "mtime", "size", "type"], key=f"{key}_sort")
+
+    total = forge.count_files(pattern)
+    files = forge.list_all_files(
+        pattern, sort_by=sort_by, reverse=sort_by in ("mtime", "size"), limit=FILE_PICKER_LIMIT
+    )
+    if not files:
+        st.info("No files match the filter.")
+        return None
+    if total > len(files):
+        st.caption(f"Showing {len(files):,} of {total:,} matching files. Refine the filter to see the rest.")
+    return st.selectbox(label, files, key=key)
+
+def show_data(data):
+    if forge.is_dataframe(data):
+        st.dataframe(data, use_container_width=True)
+    elif isinstance(data, (dict, list)):
+        st.json(data)
+    else:
+        st.text_area("File Content", data, height=200)
+
+# ------------------------ PAGE 1: CREATE ------------------------
+if page == "🔨 Forge (Create)":
+    st.markdown('<div class="forge-card forge-fade-in">', unsafe_allow_html=True)
+    st.title("🔨 Forge a New File")
+    st.write("Craft fresh **text**, **CSV**, or **JSON** files directly in the forge.")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        filename = st.text_input("Filename (without extension)", placeholder="example: heroes")
+
+    with col2:
+        ftype = st.selectbox("File Type", ["Text (.txt)", "CSV (.csv)", "JSON (.json)", "JSON Lines (.jsonl)"])
+
+    codecs = ["none", "gz", "bz2", "xz"]
+    compression = st.selectbox(
+        "Compression", codecs, index=codecs.index(forge.DEFAULT_COMPRESSION or "none"),
+        help="Compressed files are read, appended and converted transparently.",
+    )
+
+    content = st.text_area("Initial Content", height=200, placeholder="Start writing your content here...")
+
+    create_col, _ = st.columns([1, 3])
+    with create_col:
+        if st.button("🔥 Create File"):
+            msg, path = forge.create_file(filename, content, ftype, "" if compression == "none" else compression)
+            if "Created" in msg:
+                st.success(msg)
+            else:
+                st.error(msg)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# ------------------------ PAGE 2: MANAGE ------------------------
+elif page == "📜 Manage Files":
+    st.markdown('<div class="forge-card forge-fade-in">', unsafe_allow_html=True)
+    st.title("📜 Manage Files")
+
+    tab1, tab2 = st.tabs(["📂 Existing Forge Files", "💻 Upload From Device"])
+
+    # ---- Tab 1: Existing files handled by file_forge ----
+    with tab1:
+        selected = pick_file(
+            "Choose a file from the forge", "manage_file",
+            "No files found in the forge directory. Create a file first.",
+        )
+
+        if selected is not None:
+
+            st.subheader("📖 Read File")
+            view = "📄 Rows"
+            if forge.base_ext(selected) in forge.RECORD_FORMATS:
+                view = st.radio("View", ["📊 Profile", "📄 Rows"], horizontal=True, key="manage_view")
+            if view == "📊 Profile":
+                # One streaming pass, cached until the file changes
+                msg, profile = forge.profile_file(selected)
+                if profile is None:
+                    st.error(msg)
+                else:
+                    st.info(msg)
+                    st.dataframe(
+                        # min/max hold numbers or text depending on the column, so show them as text
+                        [{**c, "min": c["min"] if c["min"] is None else str(c["min"]),
+                          "max": c["max"] if c["max"] is None else str(c["max"]),
+                          "top": ", ".join(f"{v} ({n:,})" for v, n in c["top"])} for c in profile["columns"]],
+                        use_container_width=True,
+                        hide_index=True,
+                    )
+            elif selected.endswith(forge.PAGEABLE):
+                # Only the visible page is read from disk
+                total = forge.count_records(selected)
+                col1, col2 = st.columns(2)
+                with col1:
+                    page_size = st.selectbox("Rows per page", [50, 100, 500, 1000], index=1)
+                pages = max(1, -(-total // page_size))
+                with col2:
+                    page_no = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1)
+                msg, data = forge.read_page(selected, (int(page_no) - 1) * page_size, page_size)
+                st.info(msg)
+                show_data(data)
+            elif st.button("Load Forge File"):
+                msg, data = forge.read_file(selected)
+                st.info(msg)
+                show_data(data)
+
+            st.markdown("---")
+            st.subheader("➕ Append to File")
+
+            append_text = st.text_area("Append Content", height=120)
+            if st.button("Add Content"):
+                msg = forge.append_to_file(selected, append_text, batched=True)
+                if "Appended" in msg:
+                    st.success(msg)
+                else:
+                    st.error(msg)
+
+            if forge.base_ext(selected) in forge.RECORD_FORMATS:
+                st.markdown("---")
+                st.subheader("🔎 Query File")
+                # Streams the file; only matching rows and chosen columns are kept
+                _, sample = forge.preview_file(selected, 1)
+                known = list(forge.flatten_record(sample[0])) if sample and isinstance(sample[0], dict) else []
+                query_columns = st.multiselect("Columns (none selected = all)", known)
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    where = st.text_input("Where", placeholder="age >= 30 and city == Paris")
+                with col2:
+                    query_limit = st.number_input("Limit (0 = no limit)", min_value=0, value=100)
+                if st.button("Run Query"):
+                    msg, rows = forge.query_file(selected, query_columns, where, int(query_limit) or None)
+                    if rows is None:
+                        st.error(msg)
+                    else:
+                        st.info(msg)
+                        st.dataframe(rows, use_container_width=True)
+
+                st.markdown("---")
+                st.subheader("🔀 Sort File")
+                # External merge sort: runs beyond the memory budget spill to disk
+                col1, col2 = st.columns([3, 2])
+                with col1:
+                    sort_by = st.text_input("Sort by", placeholder="city, age desc")
+                with col2:
+                    sort_output = st.text_input("Output file", value=forge.sorted_name(selected))
+                col1, col2 = st.columns(2)
+                with col1:
+                    sort_memory = st.number_input("Memory budget (MB)", min_value=1,
+                                                  value=forge.SORT_MEMORY_BYTES // (1024 * 1024))
+                with col2:
+                    sort_workers = st.number_input("Worker processes", min_value=1, max_value=os.cpu_count() or 1,
+                                                   value=1)
+                if st.button("Sort"):
+                    msg, output_path = forge.sort_file(selected, sort_by, sort_output.strip() or None,
+                                                       int(sort_memory) * 1024 * 1024, int(sort_workers))
+                    if output_path is None:
+                        st.error(msg)
+                    else:
+                        st.success(msg)
+
+            st.markdown("---")
+            st.subheader("🗑️ Delete File")
+
+            if st.button("Delete File", type="primary"):
+                msg = forge.delete_file(selected)
+                if "Deleted" in msg:
+                    st.success(msg)
+                else:
+                    st.error(msg)
+
+        with st.expander("📐 CSV Memory Footprint"):
+            st.caption("Compares loading each forge CSV plainly vs. with its inferred compact schema.")
+            if st.button("Run Schema Report"):
+                msg, report = forge.schema_report()
+                st.info(msg)
+                if report:
+                    st.dataframe(pd.DataFrame(report), use_container_width=True)
+
+    # ---- Tab 2: Bring a local file into the forge ----
+    with tab2:
+        st.subheader("📥 Upload a Local File")
+        uploaded = st.file_uploader(
+            "Upload a text, CSV, JSON, or JSONL file from your system",
+            type=["txt", "csv", "json", "jsonl", "gz", "bz2", "xz"],
+        )
+
+        if uploaded is not None:
+            st.caption(f"Detected file: **{uploaded.name}** ({forge.human_size(uploaded.size)})")
+            col1, col2 = st.columns(2)
+            with col1:
+                overwrite = st.checkbox("Overwrite if it exists")
+            with col2:
+                preview_rows = st.number_input("Preview rows", min_value=1, max_value=10000, value=forge.PREVIEW_ROWS)
+
+            if st.button("📥 Save to Forge"):
+                # Copied to disk in chunks; the preview below reads from there
+                msg, info = forge.ingest_upload(uploaded, uploaded.name, overwrite=overwrite)
+                if info:
+                    st.session_state["ingested"] = info
+                    st.success(msg)
+                else:
+                    st.error(msg)
+
+            info = st.session_state.get("ingested")
+            if info and info["name"] == uploaded.name:
+                st.caption(f"SHA-256 `{info['sha256']}`")
+                msg, data = forge.preview_file(info["name"], int(preview_rows))
+                st.info(msg)
+                if data and forge.base_ext(info["name"]) == '.csv':
+                    st.dataframe(data, use_container_width=True)
+                else:
+                    show_data(data)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# ------------------------ PAGE 3: CONVERT ------------------------
+elif page == "⚗️ Convert Files":
+    st.markdown('<div class="forge-card forge-fade-in">', unsafe_allow_html=True)
+    st.title("⚗️ File Conversion")
+    st.write("Convert **CSV ↔ JSON ↔ JSONL** effortlessly, either from forge files or from your own device.")
+
+    tab1, tab2 = st.tabs(["📂 Forge Files", "💻 Upload & Convert"])
+
+    # ---- Tab 1: Convert existing forge files with file_forge ----
+    with tab1:
+        selected = pick_file(
+            "Select a CSV, JSON or JSONL file from forge", "convert_file",
+            "No files to convert in the forge.",
+        )
+
+        if selected is not None:
+            ext = forge.base_ext(selected)
+            targets = [t for t in forge.RECORD_FORMATS if t != ext]
+            target = st.selectbox(
+                "Convert to",
+                targets,
+                index=targets.index(forge.DEFAULT_TARGETS[ext]) if ext in forge.DEFAULT_TARGETS else 0,
+            )
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                workers = st.number_input("Worker processes", min_value=1, max_value=os.cpu_count() or 1, value=1)
+            with col2:
+                chunk_mb = st.number_input("Chunk size (MB)", min_value=1, value=64)
+            with col3:
+                layout = st.radio("JSON layout", ["Indented", "Compact"], horizontal=True, key="convert_layout")
+            nested = st.checkbox("Nest dotted CSV columns (a.b → {\"a\": {\"b\": ...}})",
+                                 key="convert_nested", disabled=forge.base_ext(selected) != ".csv")
+            can_resume = forge.can_convert_incrementally(selected, forge.converted_name(selected, target) or "")
+            incremental = st.checkbox("Incremental (convert only rows appended since the last incremental run)",
+                                      key="convert_incremental", disabled=not can_resume)
+
+            if st.button("⚡ Convert Forge File"):
+                msg, output_path = forge.convert_csv_json(
+                    selected, target, workers=int(workers), chunk_size=int(chunk_mb) * 1024 * 1024,
+                    indent=4 if layout == "Indented" else None, nested=nested, incremental=incremental,
+                )
+                if "Converted" in msg:
+                    st.success(msg)
+
+                    with open(output_path, "rb") as f:
+                        st.download_button(
+                            label="⬇️ Download Converted File",
+                            data=f,
+                            file_name=output_path.split("/")[-1],
+                            mime="application/octet-stream",
+                        )
+                else:
+                    st.error(msg)
+
+            st.markdown("---")
+            st.subheader("📦 Batch Convert")
+
+            col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+            with col1:
+                pattern = st.text_input("Files to convert (glob pattern)", value="*.csv")
+            with col2:
+                batch_target = st.selectbox("Output format", ["Default", *forge.RECORD_FORMATS])
+            with col3:
+                batch_workers = st.number_input("Concurrent conversions", min_value=1, max_value=32, value=4)
+            with col4:
+                force = st.checkbox("Reconvert up-to-date files")
+                batch_incremental = st.checkbox("Incremental", key="batch_incremental")
+
+            if st.button("📦 Convert Matching Files"):
+                msg, summary = forge.convert_batch(
+                    pattern,
+                    None if batch_target == "Default" else batch_target,
+                    workers=int(batch_workers),
+                    force=force,
+                    incremental=batch_incremental,
+                )
+                if summary:
+                    st.success(msg)
+                    st.dataframe(summary, use_container_width=True)
+                else:
+                    st.warning(f"No forge files match '{pattern}'.")
+
+    # ---- Tab 2: Upload file from device and convert ----
+    with tab2:
+        st.subheader("💻 Upload CSV, JSON or JSONL to Convert")
+        uploaded_conv = st.file_uploader(
+            "Upload a CSV, JSON or JSONL file",
+            type=["csv", "json", "jsonl"],
+            key="upload_convert",
+        )
+
+        direction = st.radio(
+            "Conversion Direction",
+            ["CSV → JSON", "JSON → CSV", "CSV → JSONL", "JSONL → CSV", "JSON → JSONL", "JSONL → JSON"],
+            horizontal=True,
+        )
+
+        if uploaded_conv is not None:
+            st.caption(f"Working with **{uploaded_conv.name}**")
+            upload_layout = st.radio("JSON layout", ["Indented", "Compact"], horizontal=True, key="upload_layout")
+            indent = 4 if upload_layout == "Indented" else None
+            nest_columns = st.checkbox("Nest dotted CSV columns (a.b → {\"a\": {\"b\": ...}})",
+                                       key="nest_columns", disabled=not direction.startswith("CSV"))
+
+            if st.button("⚡ Convert Uploaded File"):
+                src_name, dst_name = direction.split(" → ")
+                src_ext, dst_ext = "." + src_name.lower(), "." + dst_name.lower()
+                if forge.base_ext(uploaded_conv.name) != src_ext:
+                    st.error(f"'{uploaded_conv.name}' is not a {src_name} file.")
+                else:
+                    # Converted straight from the upload into a spooled temp file
+                    # (memory up to a limit, disk beyond); nothing is stored in the forge.
+                    # Nested JSON is flattened into dotted CSV columns
+                    msg, spool = forge.export_upload(uploaded_conv, uploaded_conv.name, dst_ext,
+                                                     indent=indent, nested=nest_columns)
+                    if spool:
+                        st.success(msg)
+                    else:
+                        st.error(msg)
+
+                    if spool:
+                        with spool:
+                            st.download_button(
+                                label=f"⬇️ Download {dst_name}",
+                                # Streamlit holds the download in memory anyway and rejects spool objects
+                                data=spool.read(),
+                                file_name=forge.download_name(uploaded_conv.name, dst_ext),
+                                mime="text/csv" if dst_ext == ".csv" else "application/json",
+                            )
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# ------------------------ PAGE 4: PERFORMANCE ------------------------
+elif page == "📈 Performance":
+    st.markdown('<div class="forge-card forge-fade-in">', unsafe_allow_html=True)
+    st.title("📈 Performance")
+    st.write("Latency, I/O and error counts for every **file_forge** operation since the server started.")
+
+    if not forge.METRICS_ENABLED:
+        st.warning("Metrics are turned off (FORGE_METRICS=0).")
+
+    metrics = forge.metrics_snapshot()
+    if not metrics:
+        st.info("No operations recorded yet. Create, read or convert a file first.")
+    else:
+        calls = sum(m["calls"] for m in metrics)
+        errors = sum(m["errors"] for m in metrics)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Operations", f"{calls:,}")
+        col2.metric("Errors", f"{errors:,}")
+        col3.metric("Data read", forge.human_size(sum(m["bytes read"] for m in metrics)))
+
+        table = pd.DataFrame(metrics).set_index("operation")
+        st.dataframe(table, use_container_width=True)
+        st.caption("Latency percentiles are estimated from histogram buckets.")
+        st.bar_chart(table[["p50 ms", "p95 ms", "p99 ms"]])
+
+    st.markdown("---")
+    st.subheader("📤 Prometheus Export")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="⬇️ Download metrics (.prom)",
+            data=forge.prometheus_text(),
+            file_name="forge_metrics.prom",
+            mime="text/plain",
+        )
+    with col2:
+        if st.button("Write Metrics File"):
+            st.success(f"Written to {forge.export_prometheus()}")
+    if st.button("Reset Metrics"):
+        forge.reset_metrics()
+        st.rerun()
+
+    st.markdown("---")
+    st.subheader("🔬 Profiles")
+    reports = forge.list_profiles()
+    if not reports:
+        st.info("No profiles captured. Turn on profiling in the sidebar to record slow operations.")
+    else:
+        st.dataframe(
+            pd.DataFrame([{
+                "report": r["name"], "call": r["call"], "seconds": r["seconds"],
+                "peak memory": forge.human_size(r["peak_bytes"]),
+            } for r in reports]),
+            use_container_width=True,
+        )
+        chosen = st.selectbox("Report", [r["name"] for r in reports])
+        text_path, prof_path = forge.profile_files(chosen)
+        with open(text_path) as f:
+            report_text = f.read()
+        st.code(report_text, language=None)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button("⬇️ Download report", report_text, file_name=chosen + ".txt", mime="text/plain")
+        with col2:
+            if os.path.exists(prof_path):
+                with open(prof_path, "rb") as f:
+                    st.download_button("⬇️ Download .prof", f, file_name=chosen + ".prof",
+                                       mime="application/octet-stream")
+        with col3:
+            if st.button("Delete All Profiles"):
+                forge.clear_profiles()
+                st.rerun()
+
+    st.markdown('</div>', unsafe_allow_html=True)
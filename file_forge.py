@@ -1,146 +1,3429 @@
-# file_forge.py
-import os
-import csv
-import json
-import pandas as pd
-
-# --- DIRECTORY MANAGEMENT ---
-# We will store all files in a "forge_files" folder so we don't mess up your project folder
-WORK_DIR = "forge_files"
-if not os.path.exists(WORK_DIR):
-    os.makedirs(WORK_DIR)
-
-def get_file_path(filename):
-    """Helper to get full path in the work directory."""
-    return os.path.join(WORK_DIR, filename)
-
-def list_all_files():
-    """Returns a list of all files in the forge."""
-    if not os.path.exists(WORK_DIR):
-        return []
-    return [f for f in os.listdir(WORK_DIR) if os.path.isfile(os.path.join(WORK_DIR, f))]
-
-# --- 1. CREATE ---
-def create_file(filename, content, file_type):
-    """Creates a file (TXT, CSV, JSON) with initial content."""
-    path = get_file_path(filename)
-    
-    try:
-        if file_type == "Text (.txt)":
-            if not filename.endswith('.txt'): filename += '.txt'
-            path = get_file_path(filename)
-            with open(path, 'w') as f:
-                f.write(content)
-                
-        elif file_type == "CSV (.csv)":
-            if not filename.endswith('.csv'): filename += '.csv'
-            path = get_file_path(filename)
-            # Expecting content to be "Name,Age\nAlice,30" format
-            lines = content.strip().split('\n')
-            with open(path, 'w', newline='') as f:
-                writer = csv.writer(f)
-                for line in lines:
-                    writer.writerow(line.split(','))
-                    
-        elif file_type == "JSON (.json)":
-            if not filename.endswith('.json'): filename += '.json'
-            path = get_file_path(filename)
-            # Expecting valid JSON string
-            try:
-                json_content = json.loads(content)
-            except json.JSONDecodeError:
-                return "Error: Invalid JSON content!", None
-            with open(path, 'w') as f:
-                json.dump(json_content, f, indent=4)
-                
-        return f"✅ Success! '{filename}' created.", path
-    except Exception as e:
-        return f"❌ Error: {str(e)}", None
-
-# --- 2. READ ---
-def read_file(filename):
-    """Reads file content."""
-    path = get_file_path(filename)
-    if not os.path.exists(path):
-        return "Error: File not found!", None
-        
-    try:
-        if filename.endswith('.txt'):
-            with open(path, 'r') as f:
-                return f.read(), None
-        elif filename.endswith('.csv'):
-            df = pd.read_csv(path)
-            return "Loaded CSV", df
-        elif filename.endswith('.json'):
-            with open(path, 'r') as f:
-                return "Loaded JSON", json.load(f)
-        else:
-            with open(path, 'r') as f:
-                return f.read(), None
-    except Exception as e:
-        return f"Error: {str(e)}", None
-
-# --- 3. APPEND ---
-def append_to_file(filename, content):
-    """Appends text to a TXT file."""
-    path = get_file_path(filename)
-    if not os.path.exists(path):
-        return "Error: File not found!"
-    
-    try:
-        # Only supporting text append for simplicity in this demo
-        with open(path, 'a') as f:
-            f.write("\n" + content)
-        return f"✅ Appended to '{filename}'!"
-    except Exception as e:
-        return f"❌ Error: {str(e)}"
-
-# --- 4. DELETE ---
-def delete_file(filename):
-    """Deletes a file."""
-    path = get_file_path(filename)
-    try:
-        if os.path.exists(path):
-            os.remove(path)
-            return f"🗑️ Deleted '{filename}'."
-        else:
-            return "Error: File not found!"
-    except Exception as e:
-        return f"❌ Error: {str(e)}"
-
-# --- 5. CONVERT ---
-def convert_csv_json(filename):
-    """Converts CSV <-> JSON based on extension."""
-    path = get_file_path(filename)
-    if not os.path.exists(path):
-        return "Error: File not found!", None
-
-    try:
-        if filename.endswith('.csv'):
-            # CSV -> JSON
-            with open(path, 'r') as f:
-                data = list(csv.DictReader(f))
-            new_name = filename.replace('.csv', '.json')
-            new_path = get_file_path(new_name)
-            with open(new_path, 'w') as f:
-                json.dump(data, f, indent=4)
-            return f"✅ Converted to '{new_name}'", new_path
-            
-        elif filename.endswith('.json'):
-            # JSON -> CSV
-            with open(path, 'r') as f:
-                data = json.load(f)
-            if not isinstance(data, list): return "Error: JSON must be a list!", None
-            
-            new_name = filename.replace('.json', '.csv')
-            new_path = get_file_path(new_name)
-            with open(new_path, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=data[0].keys())
-                writer.writeheader()
-                writer.writerows(data)
-            return f"✅ Converted to '{new_name}'", new_path
-            
-        else:
-            return "Error: Only CSV or JSON allowed!", None
-    except Exception as e:
-        return f"❌ Error: {str(e)}", None
+# file_forge.py
+import os
+import csv
+import re
+import io
+import sys
+import json
+import math
+import time
+import codecs
+import locale
+import shutil
+import bisect
+import base64
+import fnmatch
+import operator
+import functools
+import hashlib
+import heapq
+import pickle
+import tempfile
+import threading
+import queue
+import atexit
+import zlib
+import pstats
+import cProfile
+import tracemalloc
+import multiprocessing
+import gzip
+import bz2
+import lzma
+from array import array
+from collections import Counter, OrderedDict
+from itertools import chain, islice, zip_longest
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+import importlib
+
+class LazyModule:
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+# pandas takes longer to import than everything else here combined, and most
+# operations (listing, appends, streaming conversions, paging JSONL/text)
+# never touch a DataFrame
+pd = LazyModule("pandas")
+
+def is_dataframe(obj):
+    """isinstance(obj, DataFrame) without importing pandas just to say no."""
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(obj, pandas.DataFrame)
+
+try:
+    import fcntl  # POSIX only; elsewhere appends are not locked across processes
+except ImportError:
+    fcntl = None
+
+# --- METRICS ---
+# Every public operation is wrapped by @instrumented, which times the call
+# into a fixed-bucket latency histogram and counts errors. Operations report
+# bytes read/written and rows through record_io(). Recording is a few dict
+# updates per call; summaries and the Prometheus text are only built when
+# asked for. FORGE_METRICS=0 turns it all off, and FORGE_METRICS_FILE keeps a
+# Prometheus text file up to date for scraping.
+METRICS_ENABLED = os.environ.get("FORGE_METRICS", "1") != "0"
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+_METRICS = {}  # op -> {"count", "errors", "seconds", "buckets", "bytes_read", "bytes_written", "rows"}
+_METRICS_LOCK = threading.Lock()
+_OP_IO = threading.local()
+
+def record_io(bytes_read=0, bytes_written=0, rows=0):
+    """Adds I/O counts to the instrumented operation running on this thread."""
+    io_counts = getattr(_OP_IO, "counts", None)
+    if io_counts is not None:
+        io_counts[0] += bytes_read
+        io_counts[1] += bytes_written
+        io_counts[2] += rows
+
+def _is_error(result):
+    message = result[0] if isinstance(result, tuple) and result else result
+    return isinstance(message, str) and (message.startswith("Error") or message.startswith("❌"))
+
+def _observe(op, seconds, failed, io_counts):
+    with _METRICS_LOCK:
+        entry = _METRICS.get(op)
+        if entry is None:
+            entry = _METRICS[op] = {"count": 0, "errors": 0, "seconds": 0.0,
+                                    "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                                    "bytes_read": 0, "bytes_written": 0, "rows": 0}
+        entry["count"] += 1
+        entry["errors"] += failed
+        entry["seconds"] += seconds
+        entry["buckets"][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        entry["bytes_read"] += io_counts[0]
+        entry["bytes_written"] += io_counts[1]
+        entry["rows"] += io_counts[2]
+
+def instrumented(op):
+    """Decorator recording latency, errors and I/O of an operation under `op`.
+
+    When profiling is on (see set_profiling) the call also runs under
+    cProfile and tracemalloc, and slow or memory-hungry calls leave a report.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not METRICS_ENABLED and not PROFILING["enabled"]:
+                return fn(*args, **kwargs)
+            outer = getattr(_OP_IO, "counts", None)
+            io_counts = _OP_IO.counts = [0, 0, 0]
+            profile = _start_profile() if PROFILING["enabled"] else None
+            failed = True
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+                failed = _is_error(result)
+                return result
+            finally:
+                seconds = time.perf_counter() - start
+                _OP_IO.counts = outer  # nested operations keep their own counts
+                if profile is not None:
+                    _finish_profile(profile, op, args, kwargs, seconds)
+                if METRICS_ENABLED:
+                    _observe(op, seconds, failed, io_counts)
+        return wrapper
+    return decorate
+
+def _quantile(buckets, count, q):
+    """Latency quantile estimated from histogram buckets (linear within a bucket)."""
+    if not count:
+        return 0.0
+    rank = q * count
+    seen = 0
+    for i, n in enumerate(buckets):
+        if n and seen + n >= rank:
+            low = LATENCY_BUCKETS[i - 1] if i else 0.0
+            high = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1]
+            return low + (high - low) * (rank - seen) / n
+        seen += n
+    return LATENCY_BUCKETS[-1]
+
+def metrics_snapshot():
+    """One summary dict per operation: calls, errors, mean/p50/p95/p99 ms, bytes and rows."""
+    with _METRICS_LOCK:
+        entries = {op: dict(e, buckets=list(e["buckets"])) for op, e in _METRICS.items()}
+    summary = []
+    for op, e in sorted(entries.items()):
+        count = e["count"]
+        summary.append({
+            "operation": op,
+            "calls": count,
+            "errors": e["errors"],
+            "mean ms": round(1000 * e["seconds"] / count, 2) if count else 0.0,
+            "p50 ms": round(1000 * _quantile(e["buckets"], count, 0.50), 2),
+            "p95 ms": round(1000 * _quantile(e["buckets"], count, 0.95), 2),
+            "p99 ms": round(1000 * _quantile(e["buckets"], count, 0.99), 2),
+            "bytes read": e["bytes_read"],
+            "bytes written": e["bytes_written"],
+            "rows": e["rows"],
+        })
+    return summary
+
+def reset_metrics():
+    with _METRICS_LOCK:
+        _METRICS.clear()
+
+def prometheus_text():
+    """All metrics in the Prometheus text exposition format."""
+    with _METRICS_LOCK:
+        entries = {op: dict(e, buckets=list(e["buckets"])) for op, e in sorted(_METRICS.items())}
+    lines = [
+        "# HELP forge_operation_seconds Latency of file_forge operations.",
+        "# TYPE forge_operation_seconds histogram",
+    ]
+    for op, e in entries.items():
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS + (float("inf"),), e["buckets"]):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            lines.append(f'forge_operation_seconds_bucket{{op="{op}",le="{le}"}} {cumulative}')
+        lines.append(f'forge_operation_seconds_sum{{op="{op}"}} {e["seconds"]!r}')
+        lines.append(f'forge_operation_seconds_count{{op="{op}"}} {e["count"]}')
+    for name, field, help_text in (
+        ("forge_operation_errors_total", "errors", "Failed file_forge operations."),
+        ("forge_bytes_read_total", "bytes_read", "Bytes read from disk by file_forge operations."),
+        ("forge_bytes_written_total", "bytes_written", "Bytes written to disk by file_forge operations."),
+        ("forge_rows_total", "rows", "Records processed by file_forge operations."),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f'{name}{{op="{op}"}} {e[field]}' for op, e in entries.items()]
+    stats = read_cache_stats()
+    for key in ("hits", "misses", "evictions"):
+        lines += [f"# TYPE forge_read_cache_{key}_total counter", f"forge_read_cache_{key}_total {stats[key]}"]
+    lines += ["# TYPE forge_read_cache_bytes gauge", f"forge_read_cache_bytes {stats['bytes']}"]
+    return "\n".join(lines) + "\n"
+
+def export_prometheus(path=None):
+    """Writes prometheus_text() atomically (for a node_exporter textfile collector).
+
+    `path` defaults to FORGE_METRICS_FILE, else "forge_metrics.prom" next to
+    WORK_DIR. Returns the path written.
+    """
+    path = path or os.environ.get("FORGE_METRICS_FILE") or os.path.join(
+        os.path.dirname(os.path.abspath(WORK_DIR)), "forge_metrics.prom")
+    tmp = path + ".part"
+    with open(tmp, 'w') as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+    return path
+
+def start_metrics_export(path=None, interval=15):
+    """Rewrites the Prometheus file every `interval` seconds on a daemon thread."""
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                export_prometheus(path)
+            except OSError:
+                pass
+    thread = threading.Thread(target=loop, name="forge-metrics", daemon=True)
+    thread.start()
+    return thread
+
+# --- PROFILING ---
+# Opt-in (FORGE_PROFILE=1 or set_profiling(True)): instrumented operations
+# run under cProfile and tracemalloc, and a report is kept only for calls
+# slower than FORGE_PROFILE_MIN_MS or allocating more than FORGE_PROFILE_MIN_MB
+# at peak. Reports go to WORK_DIR/.profiles, which keeps the newest
+# PROFILE_KEEP. One call is profiled at a time; calls overlapping it (or
+# nested inside it) run unprofiled. Profiled calls run several times slower.
+PROFILING = {
+    "enabled": os.environ.get("FORGE_PROFILE", "0") == "1",
+    "min_seconds": float(os.environ.get("FORGE_PROFILE_MIN_MS", "500")) / 1000,
+    "min_bytes": int(float(os.environ.get("FORGE_PROFILE_MIN_MB", "100")) * 1024 * 1024),
+    "keep": int(os.environ.get("FORGE_PROFILE_KEEP", "50")),
+}
+PROFILE_DIR_NAME = ".profiles"
+_PROFILE_LOCK = threading.Lock()
+
+def set_profiling(enabled=None, min_seconds=None, min_bytes=None, keep=None):
+    """Changes profiling settings; arguments left as None keep their value."""
+    for key, value in (("enabled", enabled), ("min_seconds", min_seconds),
+                       ("min_bytes", min_bytes), ("keep", keep)):
+        if value is not None:
+            PROFILING[key] = value
+    return dict(PROFILING)
+
+def profile_dir():
+    return os.path.join(WORK_DIR, PROFILE_DIR_NAME)
+
+def _start_profile():
+    if getattr(_OP_IO, "profiling", False) or not _PROFILE_LOCK.acquire(blocking=False):
+        return None
+    _OP_IO.profiling = True
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(1)
+    else:
+        tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler, baseline, started_tracing
+
+def _finish_profile(profile, op, args, kwargs, seconds):
+    profiler, baseline, started_tracing = profile
+    profiler.disable()
+    try:
+        peak = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+        if seconds >= PROFILING["min_seconds"] or peak >= PROFILING["min_bytes"]:
+            _save_profile(op, args, kwargs, seconds, peak, profiler, tracemalloc.take_snapshot())
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        _OP_IO.profiling = False
+        _PROFILE_LOCK.release()
+
+def _save_profile(op, args, kwargs, seconds, peak, profiler, snapshot):
+    folder = profile_dir()
+    os.makedirs(folder, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{time.time_ns() % 1_000_000_000:09d}"
+    base = os.path.join(folder, f"{stamp}-{op}")
+    call = ", ".join([repr(a)[:200] for a in args] + [f"{k}={v!r}"[:200] for k, v in kwargs.items()])
+    header = {"op": op, "call": f"{op}({call})", "seconds": round(seconds, 4), "peak_bytes": peak,
+              "created": time.time(), "pid": os.getpid()}
+
+    out = io.StringIO()
+    out.write("# " + json.dumps(header) + "\n\n")
+    out.write(f"{header['call']}\n{seconds:.3f}s, peak {human_size(peak)} allocated\n\n")
+    out.write("== cProfile, by cumulative time ==\n")
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+    out.write("\n== tracemalloc, largest allocations still held ==\n")
+    for stat in snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).statistics('lineno')[:25]:
+        out.write(f"{stat}\n")
+    with open(base + ".txt", 'w') as f:
+        f.write(out.getvalue())
+    profiler.dump_stats(base + ".prof")  # for snakeviz / pstats
+    _prune_profiles(folder)
+
+def _prune_profiles(folder):
+    reports = sorted(name for name in os.listdir(folder) if name.endswith(".txt"))
+    for name in reports[:max(len(reports) - PROFILING["keep"], 0)]:
+        for ext in (".txt", ".prof"):
+            try:
+                os.remove(os.path.join(folder, name[:-4] + ext))
+            except FileNotFoundError:
+                pass
+
+def list_profiles():
+    """Saved profile reports, newest first: name, op, call, seconds, peak_bytes, created."""
+    folder = profile_dir()
+    try:
+        names = sorted((n for n in os.listdir(folder) if n.endswith(".txt")), reverse=True)
+    except FileNotFoundError:
+        return []
+    reports = []
+    for name in names:
+        try:
+            with open(os.path.join(folder, name)) as f:
+                header = json.loads(f.readline()[2:])
+        except (OSError, ValueError):
+            continue
+        reports.append(dict(header, name=name[:-4]))
+    return reports
+
+def profile_files(name):
+    """(text report path, raw .prof path) of a saved profile."""
+    base = os.path.join(profile_dir(), os.path.basename(name))
+    return base + ".txt", base + ".prof"
+
+def clear_profiles():
+    shutil.rmtree(profile_dir(), ignore_errors=True)
+
+# --- DIRECTORY MANAGEMENT ---
+# We will store all files in a "forge_files" folder so we don't mess up your project folder.
+# Importing the module touches nothing on disk: call init_forge() (optionally
+# with another root, or set FORGE_ROOT) before use to create the folder.
+WORK_DIR = os.environ.get("FORGE_ROOT", "forge_files")
+_METRICS_EXPORTER = None
+
+def init_forge(root=None):
+    """Points the forge at `root` (default FORGE_ROOT or "forge_files") and creates it.
+
+    Forgets every cached listing, layout and read result from the previous
+    root, and starts the Prometheus file export once if FORGE_METRICS_FILE
+    is set. Returns the absolute path of the forge folder.
+    """
+    global WORK_DIR, _METRICS_EXPORTER
+    WORK_DIR = root or os.environ.get("FORGE_ROOT", "forge_files")
+    os.makedirs(WORK_DIR, exist_ok=True)
+    _LAYOUT_CACHE.clear()
+    _DIR_CACHE.clear()
+    _LISTING_CACHE.clear()
+    clear_read_cache()
+    # Only the main process exports; pool workers would overwrite it with their own counts
+    if (_METRICS_EXPORTER is None and METRICS_ENABLED and os.environ.get("FORGE_METRICS_FILE")
+            and multiprocessing.parent_process() is None):
+        _METRICS_EXPORTER = start_metrics_export()
+    return os.path.abspath(WORK_DIR)
+
+# Optional sharded layout: once WORK_DIR holds a ".layout" marker saying
+# "sharded", every file lives in a subfolder named after the first two hex
+# digits of the hash of its name, so no single folder grows huge.
+LAYOUT_MARKER = ".layout"
+_SHARD_NAME = re.compile(r'^[0-9a-f]{2}$')
+_LAYOUT_CACHE = {}
+
+def is_sharded():
+    """True if WORK_DIR uses the hash-sharded layout."""
+    if WORK_DIR not in _LAYOUT_CACHE:
+        try:
+            with open(os.path.join(WORK_DIR, LAYOUT_MARKER)) as f:
+                _LAYOUT_CACHE[WORK_DIR] = f.read().strip() == "sharded"
+        except FileNotFoundError:
+            _LAYOUT_CACHE[WORK_DIR] = False
+    return _LAYOUT_CACHE[WORK_DIR]
+
+def shard_of(filename):
+    """Two-hex-digit shard folder for a file name."""
+    return hashlib.md5(filename.encode('utf-8')).hexdigest()[:2]
+
+def get_file_path(filename):
+    """Helper to get full path in the work directory."""
+    if is_sharded():
+        return os.path.join(WORK_DIR, shard_of(filename), filename)
+    return os.path.join(WORK_DIR, filename)
+
+def ensure_parent(path):
+    """Creates the folder `path` goes in (shard folders are made on demand)."""
+    folder = os.path.dirname(path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder, exist_ok=True)
+
+# Listings come from os.scandir passes cached per folder until that folder's
+# mtime changes (files added, removed or renamed). Forge writes that keep the
+# folder untouched (append, overwrite) clear the cache themselves. In the
+# sharded layout only shards that changed are rescanned.
+_DIR_CACHE = {}
+_LISTING_CACHE = {}
+SORT_KEYS = {
+    "name": lambda e: e["name"].lower(),
+    "size": lambda e: e["size"],
+    "mtime": lambda e: e["mtime"],
+    "type": lambda e: (e["type"], e["name"].lower()),
+}
+
+def invalidate_listing():
+    """Forgets cached listings (call after changing a file's size or mtime)."""
+    _DIR_CACHE.clear()
+    _LISTING_CACHE.clear()
+
+def _scan_folder(folder):
+    """(mtime, file entries, sub-folder names) of one folder, cached on its mtime."""
+    mtime = os.stat(folder).st_mtime_ns
+    cached = _DIR_CACHE.get(folder)
+    if cached and cached[0] == mtime:
+        return cached
+    entries, subdirs = [], []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.name.startswith('.'):
+                continue  # hidden sidecar files and folders
+            if entry.is_dir():
+                subdirs.append(entry.name)
+            elif entry.is_file():
+                info = entry.stat()
+                entries.append({
+                    "name": entry.name,
+                    "size": info.st_size,
+                    "mtime": info.st_mtime,
+                    "type": (base_ext(entry.name) + compression_of(entry.name)).lstrip('.').lower(),
+                })
+    _DIR_CACHE[folder] = (mtime, entries, subdirs)
+    return _DIR_CACHE[folder]
+
+def scan_files():
+    """Returns cached metadata for every forge file: name, size, mtime and type."""
+    try:
+        root_mtime, entries, subdirs = _scan_folder(WORK_DIR)
+    except FileNotFoundError:
+        return []
+    key, parts = [root_mtime], [entries]
+    if is_sharded():
+        for shard in subdirs:
+            if _SHARD_NAME.match(shard):
+                mtime, shard_entries, _ = _scan_folder(os.path.join(WORK_DIR, shard))
+                key.append(mtime)
+                parts.append(shard_entries)
+    cached = _LISTING_CACHE.get(WORK_DIR)
+    if cached and cached["key"] == key:
+        return cached["entries"]
+    entries = [e for part in parts for e in part]
+    _LISTING_CACHE[WORK_DIR] = {"key": key, "entries": entries, "sorted": {}}
+    return entries
+
+def _match_files(pattern=None, sort_by="name", reverse=False):
+    entries = scan_files()
+    cached = _LISTING_CACHE.get(WORK_DIR)
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Can't sort by '{sort_by}'")
+    if cached is not None:
+        if (sort_by, reverse) not in cached["sorted"]:
+            cached["sorted"][(sort_by, reverse)] = sorted(entries, key=SORT_KEYS[sort_by], reverse=reverse)
+        entries = cached["sorted"][(sort_by, reverse)]
+    if pattern:
+        if any(ch in pattern for ch in "*?["):
+            entries = [e for e in entries if fnmatch.fnmatch(e["name"], pattern)]
+        else:
+            needle = pattern.lower()
+            entries = [e for e in entries if needle in e["name"].lower()]
+    return entries
+
+@instrumented("list_all_files")
+def list_all_files(pattern=None, sort_by="name", reverse=False, offset=0, limit=None, details=False):
+    """Returns the files in the forge (hidden sidecar files excluded).
+
+    `pattern` is a glob ("*.csv") or a plain substring; results are sorted by
+    name, size, mtime or type and sliced with offset/limit. With details=True
+    each item is a dict with name, size, mtime and type instead of a name.
+    """
+    entries = _match_files(pattern, sort_by, reverse)
+    entries = entries[offset:offset + limit if limit is not None else None]
+    return [dict(e) for e in entries] if details else [e["name"] for e in entries]
+
+def count_files(pattern=None):
+    """Number of forge files matching `pattern` (see list_all_files)."""
+    return len(_match_files(pattern))
+
+# Helper data about a file (row index, ...) lives next to it in hidden
+# ".<name>.<kind>" sidecar files, which are removed whenever the file is.
+SIDECAR_KINDS = ["idx", "schema", "ckpt", "sha", "prof"]
+
+def sidecar_path(path, kind):
+    """Path of the `kind` sidecar file that belongs to `path`."""
+    folder, name = os.path.split(path)
+    return os.path.join(folder, f".{name}.{kind}")
+
+def drop_sidecars(path):
+    """Removes every sidecar of `path` (call whenever the file is rewritten)."""
+    for kind in SIDECAR_KINDS:
+        try:
+            os.remove(sidecar_path(path, kind))
+        except FileNotFoundError:
+            pass
+
+# --- COMPRESSION ---
+# Files named like "data.csv.gz", "data.json.xz" or "data.jsonl.bz2" are
+# stored compressed and streamed through the stdlib codecs, never inflated to
+# a temp file. Everything format-related looks at the name without the codec
+# suffix. New files are compressed with FORGE_COMPRESSION ("gz", "bz2" or
+# "xz", default none) unless create_file is told otherwise.
+CODECS = {'.gz': gzip, '.bz2': bz2, '.xz': lzma}
+DEFAULT_COMPRESSION = os.environ.get("FORGE_COMPRESSION", "").lstrip('.')
+COMPRESSION_LEVEL = int(os.environ["FORGE_COMPRESSION_LEVEL"]) if os.environ.get("FORGE_COMPRESSION_LEVEL") else None
+
+def split_codec(filename):
+    """('data.csv', '.gz') for 'data.csv.gz'; ('data.csv', '') if uncompressed."""
+    base, ext = os.path.splitext(filename)
+    return (base, ext) if ext in CODECS else (filename, '')
+
+def base_ext(filename):
+    """Format extension of a file, ignoring any codec suffix ('.csv' for 'a.csv.gz')."""
+    return os.path.splitext(split_codec(filename)[0])[1]
+
+def compression_of(filename):
+    return split_codec(filename)[1]
+
+def open_forge(path, mode='rb', codec=None, level=None, **kwargs):
+    """open() that (de)compresses according to the codec suffix of `path`.
+
+    `codec` overrides the suffix (atomic_write opens "x.csv.gz.part" as gzip).
+    """
+    module = CODECS.get(compression_of(path) if codec is None else codec)
+    if module is None:
+        return open(path, mode, **kwargs)
+    if 'b' not in mode and 't' not in mode:
+        mode += 't'
+    kwargs.pop('buffering', None)
+    level = COMPRESSION_LEVEL if level is None else level
+    if level is not None and any(c in mode for c in 'wax'):
+        kwargs['preset' if module is lzma else 'compresslevel'] = level
+    return module.open(path, mode, **kwargs)
+
+# --- STREAMING HELPERS ---
+# Conversions read one record at a time and write through a large buffer,
+# so peak memory stays flat no matter how big the input file is.
+STREAM_BUFFER = 1024 * 1024  # 1 MB
+
+def human_size(num_bytes):
+    """Formats a byte count like '12.3 MB'."""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def rate_summary(rows, num_bytes, seconds):
+    """Short stats line for a conversion: rows, bytes written and rows/sec."""
+    rate = rows / seconds if seconds > 0 else 0
+    return f"{rows:,} rows, {human_size(num_bytes)} written, {rate:,.0f} rows/s"
+
+@contextmanager
+def atomic_write(path, mode='w', codec=None, **kwargs):
+    """Opens a temp file next to `path` that replaces it only if writing succeeds.
+
+    Data is compressed per the codec suffix of `path` unless `codec` says
+    otherwise ('' writes the bytes as they are).
+    """
+    tmp = path + ".part"
+    ensure_parent(path)
+    try:
+        with open_forge(tmp, mode, codec=compression_of(path) if codec is None else codec, **kwargs) as f:
+            yield f
+        os.replace(tmp, path)
+        drop_sidecars(path)
+        invalidate_listing()
+        invalidate_read_cache(path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def write_json_array(records, f, indent=4, brackets=True):
+    """Writes records to an open text file as a JSON array, one at a time.
+
+    The output is byte-identical to json.dump(list(records), f, indent=indent).
+    indent=None writes compact JSON, identical to json.dump(..., separators=(',', ':')).
+    With brackets=False only the comma-separated items are written, which is
+    how the parallel converter produces pieces to stitch together.
+    Returns the number of records written.
+    """
+    if indent is None:
+        pad, close = "", "]"
+        dump = functools.partial(json.dumps, separators=(',', ':'))
+    else:
+        pad, close = "\n" + " " * indent, "\n]"
+        dump = lambda record: json.dumps(record, indent=indent).replace("\n", pad)
+    count = 0
+    for record in records:
+        if count:
+            f.write("," + pad)
+        elif brackets:
+            f.write("[" + pad)
+        f.write(dump(record))
+        count += 1
+    if brackets:
+        f.write(close if count else "[]")
+    return count
+
+# --- PARALLEL CONVERSION ---
+# Big CSVs are cut into byte ranges that end on record boundaries, converted in
+# a process pool and stitched back together in order.
+PARALLEL_CHUNK_SIZE = 64 * 1024 * 1024  # 64 MB per task
+SCAN_BLOCK = 4 * 1024 * 1024
+
+def csv_record_boundaries(path, chunk_size):
+    """Returns byte offsets that split a CSV file into ~chunk_size pieces.
+
+    The first offset is the end of the header row, the last is the file size.
+    Offsets always sit just after a newline that is outside quotes, so a quoted
+    field containing line breaks is never split (fields are assumed to be
+    quoted the standard way, with embedded quotes doubled).
+    """
+    cuts = []
+    target = 0
+    quotes = 0
+    pos = 0
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(SCAN_BLOCK)
+            if not block:
+                break
+            i = 0  # quotes are counted up to here
+            while True:
+                t = max(target - pos, i)
+                nl = block.find(b'\n', t) if t < len(block) else -1
+                if nl < 0:
+                    break
+                quotes += block.count(b'"', i, nl)
+                i = nl + 1
+                if quotes % 2 == 0:
+                    cuts.append(pos + i)
+                    target = pos + i + chunk_size
+            quotes += block.count(b'"', i)
+            pos += len(block)
+    if not cuts or cuts[-1] != pos:
+        cuts.append(pos)
+    return cuts
+
+def _convert_csv_range(task):
+    """Process-pool worker: converts one byte range of a CSV into JSON items."""
+    src_path, start, end, fieldnames, part_path = task
+    with open(src_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # Same newline handling as the text-mode reader used by the serial path
+    text = data.decode(locale.getpreferredencoding(False)).replace('\r\n', '\n').replace('\r', '\n')
+    reader = csv.DictReader(io.StringIO(text), fieldnames=fieldnames)
+    with open(part_path, 'w', buffering=STREAM_BUFFER) as out:
+        rows = write_json_array(reader, out, brackets=False)
+    return part_path, rows
+
+def parallel_csv_to_json(src_path, dst_path, workers=None, chunk_size=PARALLEL_CHUNK_SIZE):
+    """Converts a CSV file to a JSON array using a pool of worker processes.
+
+    Output is identical to stream_csv_to_json, which is used directly when
+    the file is smaller than two chunks or only one worker is requested.
+    Returns (rows, bytes_written, seconds).
+    """
+    workers = workers or os.cpu_count() or 1
+    if (workers <= 1 or os.path.getsize(src_path) < 2 * chunk_size
+            or compression_of(src_path) or compression_of(dst_path)):
+        # Compressed streams can't be split at byte offsets
+        return stream_csv_to_json(src_path, dst_path)
+
+    start = time.perf_counter()
+    cuts = csv_record_boundaries(src_path, chunk_size)
+    with open(src_path, 'r') as f:
+        fieldnames = csv.DictReader(f).fieldnames
+    if len(cuts) < 3 or not fieldnames:
+        return stream_csv_to_json(src_path, dst_path)
+
+    pad = "\n    "
+    rows = 0
+    ensure_parent(dst_path)
+    part_dir = tempfile.mkdtemp(prefix=".parts-", dir=os.path.dirname(os.path.abspath(dst_path)))
+    try:
+        tasks = [(src_path, a, b, fieldnames, os.path.join(part_dir, f"{n}.part"))
+                 for n, (a, b) in enumerate(zip(cuts, cuts[1:]))]
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool, \
+                atomic_write(dst_path, buffering=STREAM_BUFFER) as dst:
+            for part_path, count in pool.map(_convert_csv_range, tasks):
+                if count:
+                    dst.write(("," if rows else "[") + pad)
+                    with open(part_path, 'r') as part:
+                        shutil.copyfileobj(part, dst, STREAM_BUFFER)
+                    rows += count
+                os.remove(part_path)
+            dst.write("\n]" if rows else "[]")
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+    return rows, os.path.getsize(dst_path), time.perf_counter() - start
+
+class JSONStreamError(ValueError):
+    """Malformed JSON found by iter_json_array; `offset` is the byte position."""
+
+    def __init__(self, message, offset):
+        super().__init__(f"{message} at byte {offset}")
+        self.offset = offset
+
+_NON_WS = re.compile(r'[^ \t\r\n]')
+_STRUCT_CHARS = re.compile(r'[\[\]{}"]')
+_STRING_CHARS = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[,\] \t\r\n]')
+_DECODER = json.JSONDecoder()
+
+def iter_json_array(f, chunk_size=STREAM_BUFFER):
+    """Yields the items of a top-level JSON array one at a time.
+
+    `f` must be opened in binary mode. Only the item being parsed is kept in
+    memory, so arrays of any length (and very large single records) work.
+    Raises JSONStreamError with the byte offset on malformed input.
+    """
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf = ""
+    base = 0  # absolute character offset of buf[0]
+    byte_base = 0  # byte offset of buf[0]
+    bytes_read = 0
+    eof = False
+
+    def byte_offset(p):
+        return byte_base + len(buf[:p - base].encode('utf-8'))
+
+    def more(keep):
+        # Reads another chunk, dropping everything before absolute offset `keep`
+        nonlocal buf, base, byte_base, bytes_read, eof
+        if eof:
+            return False
+        byte_base = byte_offset(keep)
+        buf = buf[keep - base:]
+        base = keep
+        chunk = f.read(chunk_size)
+        try:
+            text = utf8.decode(chunk, final=not chunk)
+        except UnicodeDecodeError as e:
+            raise JSONStreamError("Invalid UTF-8", bytes_read + e.start) from None
+        bytes_read += len(chunk)
+        buf += text
+        if not chunk:
+            eof = True
+        return bool(chunk)
+
+    def skip_ws(p):
+        # Absolute offset of the next non-whitespace character, or None at EOF
+        while True:
+            m = _NON_WS.search(buf, p - base)
+            if m:
+                return base + m.start()
+            p = base + len(buf)
+            if not more(p):
+                return None
+
+    def value_end(p):
+        # Absolute offset just past the JSON value starting at p
+        if buf[p - base] not in '{["':
+            while True:
+                m = _SCALAR_END.search(buf, p - base)
+                if m:
+                    return base + m.start()
+                if not more(p):
+                    return base + len(buf)
+        depth, in_string, i = 0, False, p
+        while True:
+            m = (_STRING_CHARS if in_string else _STRUCT_CHARS).search(buf, i - base)
+            if m is None:
+                i = base + len(buf)
+            else:
+                j = base + m.start()
+                ch = m.group()
+                if ch == '\\':  # skip the escaped character
+                    if m.start() + 1 < len(buf):
+                        i = j + 2
+                        continue
+                    i = j
+                else:
+                    i = j + 1
+                    if ch == '"':
+                        in_string = not in_string
+                    elif ch in '[{':
+                        depth += 1
+                    else:
+                        depth -= 1
+                    if depth == 0 and not in_string:
+                        return i
+                    continue
+            if not more(p):
+                raise JSONStreamError("Unterminated value", byte_offset(p))
+
+    def read_value(p):
+        # Fast path: decode in place; fall back to scanning for the value's end
+        # when it straddles the end of the buffer (or is malformed).
+        try:
+            value, end = _DECODER.raw_decode(buf, p - base)
+            # A number cut by the buffer end ("12" of "123") must not count
+            if (end < len(buf) and buf[end] in ',] \t\r\n') or eof:
+                return value, base + end
+        except json.JSONDecodeError:
+            pass
+        end = value_end(p)
+        try:
+            return json.loads(buf[p - base:end - base]), end
+        except json.JSONDecodeError as e:
+            raise JSONStreamError(e.msg, byte_offset(p + e.pos)) from None
+
+    p = skip_ws(0)
+    if p is None:
+        raise JSONStreamError("Empty document", 0)
+    if buf[p - base] != '[':
+        raise JSONStreamError("JSON must be a list (top-level array)", byte_offset(p))
+    p = skip_ws(p + 1)
+    if p is not None and buf[p - base] == ']':
+        p += 1
+    else:
+        while True:
+            if p is None:
+                raise JSONStreamError("Unterminated array", bytes_read)
+            value, end = read_value(p)
+            yield value
+            p = skip_ws(end)
+            if p is None:
+                raise JSONStreamError("Unterminated array", bytes_read)
+            ch = buf[p - base]
+            if ch == ']':
+                p += 1
+                break
+            if ch != ',':
+                raise JSONStreamError("Expecting ',' or ']'", byte_offset(p))
+            p = skip_ws(p + 1)
+            if p is not None and buf[p - base] == ']':
+                raise JSONStreamError("Trailing comma before ']'", byte_offset(p))
+    p = skip_ws(p)
+    if p is not None:
+        raise JSONStreamError("Extra data after the array", byte_offset(p))
+
+# --- FLATTENING ---
+# JSON -> CSV flattens nested objects into dotted columns ({"a": {"b": 1}} ->
+# "a.b"), and the header is the union of every record's keys in first-seen
+# order. CSV -> JSON can rebuild the nesting with unflatten_record.
+FLATTEN_SEP = '.'
+SPILL_BYTES = int(os.environ.get("FORGE_SPILL_MB", "32")) * 1024 * 1024
+
+def _flatten_into(out, prefix, record, sep):
+    for key, value in record.items():
+        if type(value) is dict and value:
+            _flatten_into(out, f"{prefix}{key}{sep}", value, sep)
+        else:
+            out[prefix + key] = value
+
+def flatten_record(record, sep=FLATTEN_SEP):
+    """Flattens nested objects into dotted keys; lists and scalars stay as values."""
+    for value in record.values():
+        if type(value) is dict:
+            break
+    else:
+        return record  # already flat
+    out = {}
+    _flatten_into(out, "", record, sep)
+    return out
+
+def unflatten_record(row, sep=FLATTEN_SEP):
+    """Rebuilds nested objects from dotted keys (the inverse of flatten_record).
+
+    Empty cells whose column clashes with another one's nesting are dropped;
+    a non-empty one is kept under its dotted key.
+    """
+    out = {}
+    for key, value in row.items():
+        if not key or sep not in key:
+            if value in ('', None) and type(out.get(key)) is dict:
+                continue
+            out[key] = value
+            continue
+        *parents, leaf = key.split(sep)
+        node = out
+        for part in parents:
+            child = node.get(part)
+            if type(child) is not dict:
+                if child not in ('', None):
+                    node = None
+                    break
+                child = node[part] = {}
+            node = child
+        if node is None:
+            if value not in ('', None):
+                out[key] = value
+        elif not (value in ('', None) and type(node.get(leaf)) is dict):
+            node[leaf] = value
+    return out
+
+# Lists (and empty objects) go into a single cell as JSON
+_JSON_CELL = (list, dict)
+_encode_cell = json.JSONEncoder(ensure_ascii=False).encode
+
+def write_csv_records(records, f, sep=FLATTEN_SEP, spill_bytes=None):
+    """Writes dict records to an open CSV file, flattening nested objects.
+
+    The header is the union of all keys, so it isn't known until the last
+    record: rows are staged in a spooled temp file (memory up to
+    spill_bytes, default SPILL_BYTES, then disk) and copied out after the
+    header. Rows staged before a column was added are padded; the rest are
+    copied verbatim. Returns the number of rows written.
+    """
+    columns, index = [], {}
+    padded = 0  # rows staged before the last new column
+    count = 0
+    spill = tempfile.SpooledTemporaryFile(max_size=spill_bytes or SPILL_BYTES, mode='w+',
+                                          encoding='utf-8', newline='')
+    with spill:
+        writerow = csv.writer(spill).writerow
+        for record in records:
+            if not isinstance(record, dict):
+                raise ValueError("JSON list items must be objects!")
+            flat = flatten_record(record, sep)
+            keys = list(flat)
+            if keys == columns:
+                writerow([_encode_cell(v) if type(v) in _JSON_CELL else v for v in flat.values()])
+            else:
+                row = [''] * len(columns)
+                for key, value in flat.items():
+                    i = index.get(key)
+                    if i is None:
+                        if count:
+                            padded = count
+                        i = index[key] = len(columns)
+                        columns.append(key)
+                        row.append('')
+                    row[i] = _encode_cell(value) if type(value) in _JSON_CELL else value
+                writerow(row)
+            count += 1
+        if not count:
+            return 0
+        spill.seek(0)
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        width = len(columns)
+        for row in islice(csv.reader(spill), padded):
+            row.extend([''] * (width - len(row)))
+            writer.writerow(row)
+        shutil.copyfileobj(spill, f, STREAM_BUFFER)
+    return count
+
+def iter_jsonl(f):
+    """Yields the records of a JSON Lines file (binary handle), one per line.
+
+    Blank lines are skipped; a bad line raises JSONStreamError with its offset.
+    """
+    offset = 0
+    for line in f:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except UnicodeDecodeError as e:
+                raise JSONStreamError("Invalid UTF-8", offset + e.start) from None
+            except json.JSONDecodeError as e:
+                raise JSONStreamError(e.msg, offset + len(e.doc[:e.pos].encode('utf-8'))) from None
+        offset += len(line)
+
+def write_jsonl(records, f):
+    """Writes records to an open text file as JSON Lines. Returns the count."""
+    count = 0
+    for record in records:
+        f.write(json.dumps(record, separators=(',', ':')) + "\n")
+        count += 1
+    return count
+
+@contextmanager
+def file_lock(f):
+    """Holds an exclusive advisory lock on an open file, across processes."""
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def append_kind(filename):
+    """How appends are separated: 'jsonl', 'csv' or plain 'text'."""
+    ext = base_ext(filename)
+    if ext == '.jsonl':
+        return 'jsonl'
+    return 'csv' if ext == '.csv' else 'text'
+
+def _join_appends(tail, chunks, kind):
+    """Joins encoded appends for one file, given the file's current last byte.
+
+    Text always starts on a new line; CSV and JSONL only when the file
+    doesn't already end with one (a blank line would become an empty row).
+    """
+    parts = []
+    for chunk in chunks:
+        if kind == 'text' or (kind == 'csv' and tail != b'\n') or (kind == 'jsonl' and tail not in (b'', b'\n')):
+            parts.append(b'\n')
+            tail = b'\n'
+        if chunk:
+            parts.append(chunk)
+            tail = chunk[-1:]
+    return b''.join(parts)
+
+def append_chunks(path, chunks, kind, fsync=False):
+    """Appends encoded chunks to a file in one locked write.
+
+    A compressed file gets a new compressed member (all three codecs read
+    concatenated members back as one stream). Its last byte can't be peeked
+    cheaply, so CSV/JSONL chunks written to it always end with a newline.
+    """
+    break_link(path)
+    codec = compression_of(path)
+    if codec:
+        if kind != 'text':
+            chunks = [c if c.endswith(b'\n') else c + b'\n' for c in chunks]
+        tail = b'\n' if os.path.getsize(path) else b''
+        with open(path, 'ab') as raw, file_lock(raw):
+            with CODECS[codec].open(raw, 'ab') as f:
+                f.write(_join_appends(tail, chunks, kind))
+            raw.flush()
+            if fsync:
+                os.fsync(raw.fileno())
+        return
+    with open(path, 'ab+') as f, file_lock(f):
+        tail = b''
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            tail = f.read(1)
+        f.write(_join_appends(tail, chunks, kind))
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+
+def encode_jsonl(records):
+    return "".join(json.dumps(r, separators=(',', ':')) + "\n" for r in records).encode('utf-8')
+
+def append_jsonl(path, records):
+    """Appends records to a JSON Lines file in O(1), without rewriting it.
+
+    Returns the number of records appended.
+    """
+    records = list(records)
+    append_chunks(path, [encode_jsonl(records)], 'jsonl')
+    return len(records)
+
+def parse_json_records(content):
+    """Parses typed-in content as a JSON list, a single JSON value or JSON Lines."""
+    text = content.strip()
+    if not text:
+        return []
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return value if isinstance(value, list) else [value]
+
+# --- FORMAT-AGNOSTIC CONVERSION ---
+RECORD_FORMATS = ('.csv', '.json', '.jsonl')
+
+def iter_records(f, ext):
+    """Record iterator over an open binary file in one of RECORD_FORMATS."""
+    if ext == '.csv':
+        # Same decoding and newline handling as open(path, 'r')
+        return csv.DictReader(io.TextIOWrapper(f))
+    if ext == '.json':
+        return iter_json_array(f)
+    if ext == '.jsonl':
+        return iter_jsonl(f)
+    raise ValueError(f"Unsupported format '{ext}'")
+
+def write_records(records, f, ext, indent=4):
+    """Writes records to an open text file in one of RECORD_FORMATS. Returns the count.
+
+    `indent` applies to JSON output; None writes it compact.
+    """
+    if ext == '.csv':
+        return write_csv_records(records, f)
+    if ext == '.json':
+        return write_json_array(records, f, indent=indent)
+    if ext == '.jsonl':
+        return write_jsonl(records, f)
+    raise ValueError(f"Unsupported format '{ext}'")
+
+class EmptyConversionError(ValueError):
+    """A conversion to CSV found no records, so the output was left untouched."""
+
+def convert_records(src, src_ext, dst, dst_ext, indent=4, nested=False):
+    """Copies records between two open files. Returns the count.
+
+    Nested JSON is flattened into dotted CSV columns; nested=True rebuilds
+    objects from dotted columns when reading CSV.
+    """
+    records = iter_records(src, src_ext)
+    if nested and src_ext == '.csv' and dst_ext != '.csv':
+        records = map(unflatten_record, records)
+    return write_records(records, dst, dst_ext, indent)
+
+def stream_convert(src_path, dst_path, src_ext=None, dst_ext=None, indent=4, nested=False):
+    """Streams records from one file format to another in constant memory.
+
+    Formats default to the file extensions. A CSV output with no records
+    raises EmptyConversionError before replacing dst_path.
+    Returns (rows, bytes_written, seconds).
+    """
+    src_ext = src_ext or base_ext(src_path)
+    dst_ext = dst_ext or base_ext(dst_path)
+    start = time.perf_counter()
+    newline = '' if dst_ext == '.csv' else None
+    with open_forge(src_path, 'rb') as src, atomic_write(dst_path, newline=newline, buffering=STREAM_BUFFER) as dst:
+        rows = convert_records(src, src_ext, dst, dst_ext, indent, nested)
+        if rows == 0 and dst_ext == '.csv':
+            raise EmptyConversionError("No records to convert!")
+    return rows, os.path.getsize(dst_path), time.perf_counter() - start
+
+def stream_csv_to_json(src_path, dst_path):
+    """Streams a CSV file into a JSON array file. Returns (rows, bytes_written, seconds)."""
+    return stream_convert(src_path, dst_path, '.csv', '.json')
+
+def stream_json_to_csv(src_path, dst_path):
+    """Streams a JSON array file into a CSV file. Returns (rows, bytes_written, seconds)."""
+    return stream_convert(src_path, dst_path, '.json', '.csv')
+
+def stream_records(filename):
+    """Yields the records of a forge CSV, JSON or JSONL file one at a time."""
+    ext = base_ext(filename)
+    with open_forge(get_file_path(filename), 'rb') as f:
+        yield from iter_records(f, ext)
+
+# --- READ CACHE ---
+# Parsed read results (DataFrames, JSON, text) are kept in an LRU cache keyed
+# by (path, size, mtime), so Streamlit reruns don't re-parse unchanged files.
+# Entries are weighed by their real memory footprint and evicted once the
+# total passes READ_CACHE_BYTES (env FORGE_READ_CACHE_MB, default 256).
+READ_CACHE_BYTES = int(os.environ.get("FORGE_READ_CACHE_MB", "256")) * 1024 * 1024
+_READ_CACHE = OrderedDict()  # key -> (result, nbytes)
+_READ_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+_READ_CACHE_LOCK = threading.Lock()
+
+def estimate_size(obj):
+    """Approximate memory used by a parsed result, in bytes."""
+    total = 0
+    seen = set()
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if is_dataframe(item):
+            total += int(item.memory_usage(index=True, deep=True).sum())
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return total
+
+def _evict_read_cache(budget):
+    # Caller holds _READ_CACHE_LOCK
+    while _READ_CACHE and _READ_CACHE_STATS["bytes"] > budget:
+        _, (_, nbytes) = _READ_CACHE.popitem(last=False)
+        _READ_CACHE_STATS["bytes"] -= nbytes
+        _READ_CACHE_STATS["evictions"] += 1
+
+def _read_cache_key(path, *args):
+    info = os.stat(path)
+    return (path, info.st_size, info.st_mtime_ns) + args
+
+def _read_cache_get(key):
+    with _READ_CACHE_LOCK:
+        hit = _READ_CACHE.get(key)
+        if hit is None:
+            _READ_CACHE_STATS["misses"] += 1
+            return None
+        _READ_CACHE.move_to_end(key)
+        _READ_CACHE_STATS["hits"] += 1
+        return hit[0]
+
+def _read_cache_put(key, result):
+    nbytes = estimate_size(result)
+    if nbytes > READ_CACHE_BYTES:
+        return  # would evict everything else for a single entry
+    with _READ_CACHE_LOCK:
+        old = _READ_CACHE.pop(key, None)
+        if old is not None:
+            _READ_CACHE_STATS["bytes"] -= old[1]
+        _READ_CACHE[key] = (result, nbytes)
+        _READ_CACHE_STATS["bytes"] += nbytes
+        _evict_read_cache(READ_CACHE_BYTES)
+
+def invalidate_read_cache(path):
+    """Drops every cached read of `path` (called by create/append/delete)."""
+    with _READ_CACHE_LOCK:
+        for key in [k for k in _READ_CACHE if k[0] == path]:
+            _READ_CACHE_STATS["bytes"] -= _READ_CACHE.pop(key)[1]
+
+def set_read_cache_budget(num_bytes):
+    """Changes the read cache's byte budget, evicting entries if needed."""
+    global READ_CACHE_BYTES
+    READ_CACHE_BYTES = int(num_bytes)
+    with _READ_CACHE_LOCK:
+        _evict_read_cache(READ_CACHE_BYTES)
+
+def clear_read_cache():
+    """Empties the read cache (the counters are kept)."""
+    with _READ_CACHE_LOCK:
+        _READ_CACHE.clear()
+        _READ_CACHE_STATS["bytes"] = 0
+
+def read_cache_stats():
+    """Hit/miss/eviction counters plus current entries, bytes and budget."""
+    with _READ_CACHE_LOCK:
+        return dict(_READ_CACHE_STATS, entries=len(_READ_CACHE), budget=READ_CACHE_BYTES)
+
+# --- 1. CREATE ---
+def _with_extension(filename, ext, compression):
+    """Adds the format extension and, for new files, the codec suffix."""
+    base, codec = split_codec(filename)
+    if not base.endswith(ext): base += ext
+    if not codec and compression:
+        codec = '.' + compression.lstrip('.')
+    return base + codec
+
+@instrumented("create_file")
+def create_file(filename, content, file_type, compression=None):
+    """Creates a file (TXT, CSV, JSON, JSONL) with initial content.
+
+    `compression` ("gz", "bz2", "xz" or "" for none) defaults to
+    FORGE_COMPRESSION; a codec suffix already in `filename` wins.
+    """
+    path = get_file_path(filename)
+    compression = DEFAULT_COMPRESSION if compression is None else compression
+    
+    try:
+        if file_type == "Text (.txt)":
+            filename = _with_extension(filename, '.txt', compression)
+            path = get_file_path(filename)
+            ensure_parent(path)
+            with atomic_write(path, 'w') as f:
+                f.write(content)
+                
+        elif file_type == "CSV (.csv)":
+            filename = _with_extension(filename, '.csv', compression)
+            path = get_file_path(filename)
+            ensure_parent(path)
+            # Expecting content to be "Name,Age\nAlice,30" format
+            lines = content.strip().split('\n')
+            with atomic_write(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                for line in lines:
+                    writer.writerow(line.split(','))
+                    
+        elif file_type == "JSON (.json)":
+            filename = _with_extension(filename, '.json', compression)
+            path = get_file_path(filename)
+            ensure_parent(path)
+            # Expecting valid JSON string
+            try:
+                json_content = json.loads(content)
+            except json.JSONDecodeError:
+                return "Error: Invalid JSON content!", None
+            with atomic_write(path, 'w') as f:
+                json.dump(json_content, f, indent=4)
+                
+        elif file_type == "JSON Lines (.jsonl)":
+            filename = _with_extension(filename, '.jsonl', compression)
+            path = get_file_path(filename)
+            ensure_parent(path)
+            # Expecting one JSON value per line, or a JSON list of records
+            try:
+                records = parse_json_records(content)
+            except json.JSONDecodeError:
+                return "Error: Invalid JSON Lines content!", None
+            with atomic_write(path, 'w') as f:
+                write_jsonl(records, f)
+                
+        record_io(bytes_written=os.path.getsize(path))
+        return f"✅ Success! '{filename}' created.", path
+    except Exception as e:
+        return f"❌ Error: {str(e)}", None
+
+# --- 2. READ ---
+@instrumented("read_file")
+def read_file(filename, use_cache=True):
+    """Reads file content.
+
+    Results are served from the read cache while the file is unchanged, so
+    callers must not modify a returned DataFrame or JSON object in place.
+    """
+    path = get_file_path(filename)
+    if not os.path.exists(path):
+        return "Error: File not found!", None
+
+    key = _read_cache_key(path, "read") if use_cache else None
+    if key is not None:
+        cached = _read_cache_get(key)
+        if cached is not None:
+            return cached
+    result = _read_file(path, filename)
+    if not result[0].startswith("Error"):
+        record_io(bytes_read=os.path.getsize(path), rows=_row_count(result[1]))
+        if key is not None:
+            _read_cache_put(key, result)
+    return result
+
+def _row_count(data):
+    return len(data) if isinstance(data, list) or is_dataframe(data) else 0
+
+def _read_file(path, filename):
+    """Parses a forge file from disk (read_file without the cache)."""
+    ext = base_ext(filename)
+    try:
+        if ext == '.txt':
+            with open_forge(path, 'r') as f:
+                return f.read(), None
+        elif ext == '.csv':
+            # pandas picks the codec from the suffix itself
+            df = read_csv_typed(path, load_schema(path))
+            return "Loaded CSV", df
+        elif ext == '.json':
+            with open_forge(path, 'r') as f:
+                return "Loaded JSON", json.load(f)
+        elif ext == '.jsonl':
+            # Use stream_records() to walk big JSONL files without loading them
+            return "Loaded JSONL", list(stream_records(filename))
+        else:
+            with open_forge(path, 'r') as f:
+                return f.read(), None
+    except Exception as e:
+        return f"Error: {str(e)}", None
+
+# --- 3. APPEND ---
+@instrumented("append_to_file")
+def append_to_file(filename, content, batched=False):
+    """Appends text to a file, or JSON records to a JSONL file.
+
+    With batched=True the append goes through the shared AppendService and
+    is group-committed with other pending appends; the call still waits for
+    its write to land.
+    """
+    path = get_file_path(filename)
+    if not os.path.exists(path):
+        return "Error: File not found!"
+    
+    kind = append_kind(filename)
+    if kind == 'jsonl':
+        # Records go on new lines at the end; the file is never rewritten
+        try:
+            records = parse_json_records(content)
+        except json.JSONDecodeError:
+            return "Error: Invalid JSON Lines content!"
+        chunk = encode_jsonl(records)
+        message = f"✅ Appended {len(records)} record(s) to '{filename}'!"
+    else:
+        # Other files get plain text appended on a new line
+        chunk = content.encode(locale.getpreferredencoding(False))
+        message = f"✅ Appended to '{filename}'!"
+
+    rows = len(records) if kind == 'jsonl' else 1
+    if batched:
+        message = append_service().submit(path, chunk, kind, message).result()
+        if not _is_error(message):
+            record_io(bytes_written=len(chunk), rows=rows)
+        return message
+    try:
+        append_chunks(path, [chunk], kind)
+        _after_append(path)
+        record_io(bytes_written=len(chunk), rows=rows)
+        return message
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+
+def _after_append(path):
+    # Only files that have been paged have an index worth keeping current
+    if os.path.exists(sidecar_path(path, "idx")):
+        update_index(path)
+    invalidate_listing()
+    invalidate_read_cache(path)
+
+# --- 4. DELETE ---
+@instrumented("delete_file")
+def delete_file(filename):
+    """Deletes a file."""
+    path = get_file_path(filename)
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+            drop_sidecars(path)
+            invalidate_listing()
+            invalidate_read_cache(path)
+            return f"🗑️ Deleted '{filename}'."
+        else:
+            return "Error: File not found!"
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+
+# --- 5. CONVERT ---
+# Default output format for each convertible input format
+DEFAULT_TARGETS = {'.csv': '.json', '.json': '.csv', '.jsonl': '.json'}
+
+def converted_name(filename, target=None):
+    """Name of the file convert_csv_json produces for `filename` (None if unsupported).
+
+    The output keeps the source's codec: 'a.csv.gz' converts to 'a.json.gz'.
+    """
+    name, codec = split_codec(filename)
+    base, ext = os.path.splitext(name)
+    if ext not in DEFAULT_TARGETS:
+        return None
+    target = target or DEFAULT_TARGETS[ext]
+    if target == ext or target not in RECORD_FORMATS:
+        return None
+    return base + target + codec
+
+@instrumented("convert_csv_json")
+def convert_csv_json(filename, target=None, streaming=True, workers=1, chunk_size=PARALLEL_CHUNK_SIZE, indent=4,
+                     nested=False, incremental=False):
+    """Converts between CSV, JSON and JSON Lines based on extension.
+
+    `target` is the output extension ('.csv', '.json' or '.jsonl'); by default
+    CSV -> JSON, JSON -> CSV and JSONL -> JSON. Conversions stream in constant
+    memory and the message reports rows/sec and bytes written; streaming=False
+    keeps the old load-everything CSV -> JSON path for comparison. workers > 1
+    (or None for one per CPU) converts a large CSV to JSON in parallel chunks
+    of chunk_size bytes. indent=None writes compact JSON. Nested JSON is
+    flattened into dotted CSV columns; nested=True turns dotted CSV columns
+    back into objects. The output gets the source's mtime, so it counts as
+    up to date until the source changes. incremental=True converts only
+    what was appended to a CSV/JSONL source since the last incremental run
+    (see convert_incremental). Other conversions are served from the
+    conversion cache when the same content was converted the same way before.
+    """
+    path = get_file_path(filename)
+    if not os.path.exists(path):
+        return "Error: File not found!", None
+
+    try:
+        new_name = converted_name(filename, target)
+        if new_name is None:
+            return "Error: Only CSV, JSON or JSONL conversions allowed!", None
+        new_path = get_file_path(new_name)
+        src_ext = base_ext(filename)
+        dst_ext = base_ext(new_name)
+        source = os.stat(path)
+
+        if incremental and can_convert_incrementally(filename, new_name):
+            rows, read, written, seconds, full = convert_incremental(path, new_path, src_ext, dst_ext, indent, nested)
+            invalidate_listing()
+            record_io(bytes_read=read, bytes_written=written, rows=rows)
+            if full:
+                return f"✅ Converted to '{new_name}' ({rate_summary(rows, written, seconds)})", new_path
+            if not read:
+                return f"✅ Converted to '{new_name}' (already up to date)", new_path
+            return f"✅ Converted to '{new_name}' incrementally (+{rate_summary(rows, written, seconds)})", new_path
+
+        key = None
+        if CONVERSION_CACHE_BYTES:
+            key = conversion_key(file_digest(filename), src_ext + compression_of(filename),
+                                 dst_ext + compression_of(new_name), indent=indent, nested=nested)
+            if cache_fetch(key, new_path):
+                os.utime(new_path, ns=(time.time_ns(), source.st_mtime_ns))
+                return f"✅ Converted to '{new_name}' (cached, {human_size(os.path.getsize(new_path))})", new_path
+
+        if (src_ext, dst_ext) == ('.csv', '.json') and workers != 1 and indent == 4 and not nested:
+            rows, written, seconds = parallel_csv_to_json(path, new_path, workers, chunk_size)
+        elif (src_ext, dst_ext) == ('.csv', '.json') and not streaming and not nested:
+            start = time.perf_counter()
+            with open_forge(path, 'r') as f:
+                data = list(csv.DictReader(f))
+            with atomic_write(new_path) as f:
+                json.dump(data, f, indent=indent, separators=None if indent is not None else (',', ':'))
+            rows, written, seconds = len(data), os.path.getsize(new_path), time.perf_counter() - start
+        else:
+            rows, written, seconds = stream_convert(path, new_path, src_ext, dst_ext, indent, nested)
+
+        os.utime(new_path, ns=(source.st_atime_ns, source.st_mtime_ns))
+        if key and written <= CONVERSION_CACHE_BYTES:
+            cache_store(key, new_path)
+        invalidate_listing()
+        record_io(bytes_read=source.st_size, bytes_written=written, rows=rows)
+        return f"✅ Converted to '{new_name}' ({rate_summary(rows, written, seconds)})", new_path
+    except EmptyConversionError:
+        return "Error: No records to convert!", None
+    except Exception as e:
+        return f"❌ Error: {str(e)}", None
+
+# Incremental conversion: a ".ckpt" sidecar on the output records how far
+# into the source it got (byte offset, rows, CSV header) and what the output
+# looked like afterwards. When the source has only grown since, just the new
+# tail is converted and patched onto the output: CSV/JSONL rows are appended
+# and a JSON array gets its closing bracket moved. A rewritten source, an
+# edited output or different options fall back to a full conversion.
+INCREMENTAL_SOURCES = ('.csv', '.jsonl')
+
+class _BoundedReader(io.RawIOBase):
+    """Read-only view of a binary file from its current position up to `end`."""
+
+    def __init__(self, f, end):
+        self._f = f
+        self._left = end - f.tell()
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = self._f.readinto(memoryview(b)[:max(self._left, 0)]) or 0
+        self._left -= n
+        return n
+
+def can_convert_incrementally(filename, new_name):
+    """True if convert_incremental supports this source/output pair."""
+    return (base_ext(filename) in INCREMENTAL_SOURCES
+            and not compression_of(filename) and not compression_of(new_name))
+
+def _source_state(path, offset):
+    """Identity of the first `offset` bytes of a file: inode plus head/tail checksums."""
+    with open(path, 'rb') as f:
+        head = zlib.crc32(f.read(min(offset, FINGERPRINT_BYTES)))
+        f.seek(max(offset - FINGERPRINT_BYTES, 0))
+        tail = zlib.crc32(f.read(min(offset, FINGERPRINT_BYTES)))
+        return {"inode": os.fstat(f.fileno()).st_ino, "head": head, "tail": tail}
+
+def _source_end(path):
+    """Size of `path` with no append half-written (appenders hold the file lock)."""
+    with open(path, 'rb') as f, file_lock(f):
+        return os.fstat(f.fileno()).st_size
+
+def _first_csv_row(path):
+    with open(path, 'rb') as f:
+        return next(csv.reader(io.TextIOWrapper(f)), None)
+
+def load_checkpoint(new_path):
+    """The incremental-conversion checkpoint of an output file, or None."""
+    try:
+        with open(sidecar_path(new_path, "ckpt")) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def _resumable(ckpt, path, new_path, options, end):
+    if not ckpt or not ckpt.get("rows") or ckpt.get("options") != options or ckpt["offset"] > end:
+        return False
+    if _source_state(path, ckpt["offset"]) != ckpt["state"]:
+        return False  # source was rewritten, not appended to
+    try:
+        out = os.stat(new_path)
+    except FileNotFoundError:
+        return False
+    return [out.st_size, out.st_mtime_ns] == ckpt["output"]
+
+def _append_converted(records, ckpt, dst_ext, indent, new_path):
+    """Writes the new records onto the end of an existing output. Returns the count."""
+    if dst_ext == '.jsonl':
+        with open(new_path, 'a', buffering=STREAM_BUFFER) as out:
+            return write_jsonl(records, out)
+    if dst_ext == '.csv':
+        columns = ckpt["columns"]
+        index = set(columns)
+        count = 0
+        with open(new_path, 'a', newline='', buffering=STREAM_BUFFER) as out:
+            writerow = csv.writer(out).writerow
+            for record in records:
+                if not isinstance(record, dict):
+                    raise ValueError("JSON list items must be objects!")
+                flat = flatten_record(record)
+                if not index.issuperset(flat):
+                    return None  # new column: the header has to be rewritten
+                writerow([_encode_cell(v) if type(v) in _JSON_CELL else v
+                          for v in (flat.get(c, '') for c in columns)])
+                count += 1
+        return count
+    # JSON array: overwrite the closing bracket, continue the items, close again
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return 0
+    pad, close = ("", "]") if indent is None else ("\n" + " " * indent, "\n]")
+    closing = close.replace("\n", os.linesep).encode()
+    with open(new_path, 'r+b') as raw:
+        size = raw.seek(0, os.SEEK_END)
+        raw.seek(max(size - len(closing), 0))
+        if raw.read() != closing:
+            return None
+        raw.seek(size - len(closing))
+        raw.truncate()
+        out = io.TextIOWrapper(raw)
+        out.write("," + pad)
+        count = write_json_array(chain([first], records), out, indent, brackets=False)
+        out.write(close)
+        out.flush()
+        out.detach()
+    return count
+
+def convert_incremental(path, new_path, src_ext, dst_ext, indent=4, nested=False):
+    """Brings new_path up to date with a CSV/JSONL source in proportion to what changed.
+
+    Converts only the bytes appended since the checkpoint when possible,
+    otherwise the whole source, and saves a new checkpoint either way.
+    Returns (rows, bytes_read, bytes_written, seconds, full).
+    """
+    start = time.perf_counter()
+    end = _source_end(path)
+    options = {"source": os.path.basename(path), "target": dst_ext, "indent": indent, "nested": nested}
+    ckpt = load_checkpoint(new_path)
+    rows = None
+    full = not _resumable(ckpt, path, new_path, options, end)
+    if not full:
+        offset = ckpt["offset"]
+        break_link(new_path)
+        before = os.path.getsize(new_path)
+        rows = 0
+        if end > offset:
+            with open(path, 'rb') as raw:
+                raw.seek(offset)
+                src = io.BufferedReader(_BoundedReader(raw, end), STREAM_BUFFER)
+                if src_ext == '.csv':
+                    records = csv.DictReader(io.TextIOWrapper(src), fieldnames=ckpt["fieldnames"])
+                else:
+                    records = iter_jsonl(src)
+                if nested and src_ext == '.csv' and dst_ext != '.csv':
+                    records = map(unflatten_record, records)
+                try:
+                    rows = _append_converted(records, ckpt, dst_ext, indent, new_path)
+                except BaseException:
+                    _truncate(new_path, before)
+                    raise
+            if rows is None:
+                _truncate(new_path, before)
+                full = True
+        written = os.path.getsize(new_path) - before
+        bytes_read = end - offset
+    if full:
+        with open(path, 'rb') as raw, atomic_write(new_path, newline='' if dst_ext == '.csv' else None,
+                                                    buffering=STREAM_BUFFER) as dst:
+            src = io.BufferedReader(_BoundedReader(raw, end), STREAM_BUFFER)
+            rows = convert_records(src, src_ext, dst, dst_ext, indent, nested)
+            if rows == 0 and dst_ext == '.csv':
+                raise EmptyConversionError("No records to convert!")
+        written, bytes_read = os.path.getsize(new_path), end
+        ckpt = {"rows": 0}
+        if rows:
+            ckpt["fieldnames"] = _first_csv_row(path) if src_ext == '.csv' else None
+            ckpt["columns"] = _first_csv_row(new_path) if dst_ext == '.csv' else None
+    else:
+        idx = sidecar_path(new_path, "idx")
+        if rows and os.path.exists(idx):
+            update_index(new_path)
+        invalidate_read_cache(new_path)
+
+    source = os.stat(path)
+    os.utime(new_path, ns=(source.st_atime_ns, source.st_mtime_ns))
+    out = os.stat(new_path)
+    ckpt.update(options=options, offset=end, state=_source_state(path, end),
+                output=[out.st_size, out.st_mtime_ns], rows=ckpt["rows"] + rows)
+    with atomic_write(sidecar_path(new_path, "ckpt")) as f:
+        json.dump(ckpt, f)
+    return rows, bytes_read, written, time.perf_counter() - start, full
+
+def _truncate(path, size):
+    with open(path, 'r+b') as f:
+        f.truncate(size)
+
+# --- 6. BATCH CONVERT ---
+@instrumented("convert_batch")
+def convert_batch(files="*", target=None, workers=4, use_processes=False, force=False, incremental=False):
+    """Converts many forge files concurrently.
+
+    `files` is a glob pattern (e.g. "*.csv") or a list of filenames and
+    `target` the output extension as in convert_csv_json. A file is
+    skipped when its output exists and is at least as new as the source,
+    unless force=True; incremental=True converts only what was appended
+    to stale CSV/JSONL sources. Returns (message, summary) where summary holds one
+    dict per file: file, output, status, seconds and message.
+    """
+    if isinstance(files, str):
+        names = [f for f in list_all_files() if fnmatch.fnmatch(f, files)]
+    else:
+        names = list(files)
+
+    summary = []
+    todo = []
+    for name in names:
+        output = converted_name(name, target)
+        entry = {"file": name, "output": output, "status": "", "seconds": 0.0, "message": ""}
+        summary.append(entry)
+        path = get_file_path(name)
+        if output is None:
+            entry["status"], entry["message"] = "failed", "Error: Only CSV, JSON or JSONL conversions allowed!"
+        elif not os.path.exists(path):
+            entry["status"], entry["message"] = "failed", "Error: File not found!"
+        elif (not force and os.path.exists(get_file_path(output))
+                and os.path.getmtime(get_file_path(output)) >= os.path.getmtime(path)):
+            entry["status"], entry["message"] = "skipped", "Output is up to date"
+        else:
+            todo.append(entry)
+
+    start = time.perf_counter()
+    if todo:
+        if use_processes:
+            # spawned workers import the module afresh and would convert in the default root
+            pool = ProcessPoolExecutor(max_workers=max(1, workers), initializer=init_forge,
+                                       initargs=(os.path.abspath(WORK_DIR),))
+        else:
+            pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        with pool:
+            futures = {pool.submit(_timed_convert, entry["file"], target, incremental): entry for entry in todo}
+            for future in as_completed(futures):
+                entry = futures[future]
+                try:
+                    msg, output_path, seconds = future.result()
+                except Exception as e:
+                    msg, output_path, seconds = f"❌ Error: {str(e)}", None, 0.0
+                entry["status"] = "converted" if output_path else "failed"
+                entry["message"], entry["seconds"] = msg, round(seconds, 3)
+
+    counts = {status: sum(1 for e in summary if e["status"] == status)
+              for status in ("converted", "skipped", "failed")}
+    msg = (f"⚡ Batch done in {time.perf_counter() - start:.1f}s: {counts['converted']} converted, "
+           f"{counts['skipped']} skipped, {counts['failed']} failed.")
+    return msg, summary
+
+def _timed_convert(filename, target, incremental=False):
+    """Pool task for convert_batch: convert_csv_json plus its wall time."""
+    start = time.perf_counter()
+    msg, output_path = convert_csv_json(filename, target, incremental=incremental)
+    return msg, output_path, time.perf_counter() - start
+
+# --- 7. PAGED READS ---
+# A ".idx" sidecar stores the byte offset where every record (line, or CSV
+# row, quote-aware) starts, so any page is read with one seek. It is built on
+# first use and only the new tail is scanned after an append.
+PAGEABLE = ('.csv', '.txt', '.jsonl')
+INDEX_MAGIC = 0x31584449464F46  # "FOFIDX1"
+INDEX_HEADER = 3  # magic, fingerprint length, fingerprint crc
+FINGERPRINT_BYTES = 4096
+
+def _fingerprint(path, length):
+    with open(path, 'rb') as f:
+        return zlib.crc32(f.read(length))
+
+def _scan_record_starts(path, start, quote_aware):
+    """Offsets just past every record-ending newline after `start`.
+
+    `start` must itself be a record boundary (outside any quoted field).
+    """
+    starts = array('Q')
+    pos = start
+    quotes = 0
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while True:
+            block = f.read(SCAN_BLOCK)
+            if not block:
+                break
+            if not quote_aware or (quotes % 2 == 0 and b'"' not in block):
+                nl = block.find(b'\n')
+                while nl >= 0:
+                    starts.append(pos + nl + 1)
+                    nl = block.find(b'\n', nl + 1)
+            else:
+                counted = 0
+                nl = block.find(b'\n')
+                while nl >= 0:
+                    quotes += block.count(b'"', counted, nl)
+                    counted = nl + 1
+                    if quotes % 2 == 0:
+                        starts.append(pos + nl + 1)
+                    nl = block.find(b'\n', nl + 1)
+                quotes += block.count(b'"', counted)
+            pos += len(block)
+    return starts
+
+def _read_index_entries(idx_path, first, count, skip_header=True):
+    """Reads `count` record offsets starting at entry `first` from an index file."""
+    entries = array('Q')
+    with open(idx_path, 'rb') as f:
+        f.seek(((INDEX_HEADER if skip_header else 0) + first) * entries.itemsize)
+        data = f.read(count * entries.itemsize)
+    entries.frombytes(data[:len(data) - len(data) % entries.itemsize])
+    return entries
+
+def update_index(path):
+    """Builds the row-offset index of `path`, or extends it after an append.
+
+    Returns the index path, or None for file types that are not pageable.
+    The index is rebuilt from scratch if the file was rewritten or truncated.
+    """
+    if os.path.splitext(path)[1] not in PAGEABLE:
+        return None
+    idx_path = sidecar_path(path, "idx")
+    size = os.path.getsize(path)
+    quote_aware = path.endswith('.csv')
+
+    if os.path.exists(idx_path):
+        header = _read_index_entries(idx_path, 0, INDEX_HEADER, skip_header=False)
+        entries = (os.path.getsize(idx_path) // header.itemsize) - INDEX_HEADER
+        last = _read_index_entries(idx_path, entries - 1, 1)[0] if entries > 0 else None
+        valid = (len(header) == INDEX_HEADER and header[0] == INDEX_MAGIC and last is not None
+                 and last <= size and header[1] <= size
+                 and _fingerprint(path, header[1]) == header[2])
+        if valid:
+            if last < size:
+                new_starts = _scan_record_starts(path, last, quote_aware)
+                if new_starts:
+                    with open(idx_path, 'ab') as f:
+                        new_starts.tofile(f)
+            return idx_path
+
+    head_len = min(size, FINGERPRINT_BYTES)
+    index = array('Q', [INDEX_MAGIC, head_len, _fingerprint(path, head_len), 0])
+    index.extend(_scan_record_starts(path, 0, quote_aware))
+    with atomic_write(idx_path, 'wb') as f:
+        index.tofile(f)
+    return idx_path
+
+def _record_span(path):
+    """(idx_path, complete_records, has_partial_tail) for a pageable file."""
+    idx_path = update_index(path)
+    entries = os.path.getsize(idx_path) // 8 - INDEX_HEADER
+    last = _read_index_entries(idx_path, entries - 1, 1)[0]
+    return idx_path, entries - 1, os.path.getsize(path) > last
+
+@instrumented("count_records")
+def count_records(filename):
+    """Number of lines (or CSV data rows, header excluded) in a pageable file."""
+    path = get_file_path(filename)
+    if compression_of(filename):
+        # No byte offsets to index inside a compressed stream
+        with open_forge(path, 'rb') as f:
+            total = sum(1 for _ in f)
+    else:
+        _, complete, tail = _record_span(path)
+        total = complete + tail
+    return max(total - 1, 0) if base_ext(filename) == '.csv' else total
+
+@instrumented("read_page")
+def read_page(filename, offset=0, limit=100):
+    """Reads records offset .. offset+limit-1 of a CSV, TXT or JSONL file.
+
+    Only the requested window is read from disk (via the row-offset index),
+    so the last page is as fast as the first. Returns (message, data) where
+    data is a DataFrame for CSV, a list of records for JSONL and a string of
+    lines for text.
+    """
+    path = get_file_path(filename)
+    if not os.path.exists(path):
+        return "Error: File not found!", None
+    if base_ext(filename) not in PAGEABLE:
+        return "Error: Only CSV, TXT or JSONL files can be paged!", None
+
+    key = _read_cache_key(path, "page", offset, limit)
+    cached = _read_cache_get(key)
+    if cached is not None:
+        return cached
+    if compression_of(filename):
+        result = _read_page_sequential(path, filename, offset, limit)
+    else:
+        result = _read_page(path, filename, offset, limit)
+    if not result[0].startswith("Error"):
+        _read_cache_put(key, result)
+    return result
+
+def _read_page(path, filename, offset, limit):
+    """read_page without the cache."""
+    try:
+        idx_path, complete, tail = _record_span(path)
+        total = complete + tail
+        skip = 1 if filename.endswith('.csv') else 0  # CSV header is record 0
+        first = max(offset, 0) + skip
+        last = min(first + max(limit, 0), total)
+        rows = max(total - skip, 0)
+
+        with open(path, 'rb') as f:
+            window = b""
+            if first < last:
+                bounds = _read_index_entries(idx_path, first, last - first + 1)
+                start = bounds[0]
+                end = bounds[-1] if len(bounds) > last - first else os.path.getsize(path)
+                f.seek(start)
+                window = f.read(end - start)
+            if skip:
+                header_end = _read_index_entries(idx_path, 1, 1)
+                f.seek(0)
+                header = f.read(header_end[0]) if header_end else f.read()
+        record_io(bytes_read=len(window) + (len(header) if skip else 0), rows=max(last - first, 0))
+
+        if first < last:
+            msg = f"Rows {first - skip + 1:,}–{last - skip:,} of {rows:,}"
+        else:
+            msg = f"No rows on this page ({rows:,} in total)"
+        if filename.endswith('.csv'):
+            if not header.strip():
+                return msg, pd.DataFrame()
+            schema = load_schema(path) if os.path.exists(sidecar_path(path, "schema")) else None
+            return msg, read_csv_typed(io.BytesIO(header.rstrip(b'\r\n') + b'\n' + window), schema)
+        text = window.decode('utf-8', errors='replace')
+        if filename.endswith('.jsonl'):
+            return msg, [json.loads(line) for line in text.splitlines() if line.strip()]
+        return msg, text
+    except Exception as e:
+        return f"Error: {str(e)}", None
+
+def _read_page_sequential(path, filename, offset, limit):
+    """read_page for compressed files: decompresses up to the page and stops."""
+    offset, limit = max(offset, 0), max(limit, 0)
+    try:
+        ext = base_ext(filename)
+        if ext == '.csv':
+            data = pd.read_csv(path, skiprows=range(1, offset + 1), nrows=limit)
+            count = len(data)
+        else:
+            with open_forge(path, 'rb') as f:
+                lines = [line.decode('utf-8', errors='replace') for line in islice(f, offset, offset + limit)]
+            count = len(lines)
+            if ext == '.jsonl':
+                data = [json.loads(line) for line in lines if line.strip()]
+            else:
+                data = "".join(lines)
+        record_io(rows=count)
+        if count:
+            return f"Rows {offset + 1:,}–{offset + count:,}", data
+        return "No rows on this page", data
+    except Exception as e:
+        return f"Error: {str(e)}", None
+
+# --- 8. SHARDED LAYOUT ---
+def _owner_name(entry):
+    """Forge file a top-level entry belongs to (sidecars map to their file)."""
+    if entry.startswith('.'):
+        for kind in SIDECAR_KINDS:
+            if entry.endswith('.' + kind):
+                return entry[1:-len(kind) - 1]
+        return None
+    return entry
+
+@instrumented("migrate_to_sharded")
+def migrate_to_sharded():
+    """Moves a flat forge into the hash-sharded layout (files and sidecars).
+
+    Safe to re-run: anything still in the top folder is moved on each run.
+    Returns (message, files_moved).
+    """
+    moved = 0
+    try:
+        os.makedirs(WORK_DIR, exist_ok=True)
+        with os.scandir(WORK_DIR) as it:
+            entries = [e.name for e in it if e.is_file() and e.name != LAYOUT_MARKER]
+        for entry in entries:
+            owner = _owner_name(entry)
+            if owner is None:
+                continue
+            shard_dir = os.path.join(WORK_DIR, shard_of(owner))
+            os.makedirs(shard_dir, exist_ok=True)
+            os.replace(os.path.join(WORK_DIR, entry), os.path.join(shard_dir, entry))
+            moved += not entry.startswith('.')
+        with open(os.path.join(WORK_DIR, LAYOUT_MARKER), 'w') as f:
+            f.write("sharded\n")
+        _LAYOUT_CACHE.pop(WORK_DIR, None)
+        invalidate_listing()
+        return f"✅ Forge is sharded ({moved:,} files moved).", moved
+    except Exception as e:
+        return f"❌ Error: {str(e)}", moved
+
+# --- 9. SCHEMA INFERENCE ---
+# pandas guesses every CSV column type from scratch and keeps text as object
+# columns. A schema inferred once from a sample (and saved in a ".schema"
+# sidecar) lets later loads pick compact dtypes up front: small integer and
+# float types, categoricals for repetitive text, and parsed dates.
+SCHEMA_SAMPLE_ROWS = 10000
+CATEGORY_MAX_RATIO = 0.5  # at most this many distinct values per non-null value
+_DATE_LIKE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+def schema_from_frame(df):
+    """Compact-dtype schema for the columns of a DataFrame (usually a sample)."""
+    schema = {"dtype": {}, "parse_dates": [], "downcast": {}}
+    for col in df.columns:
+        series = df[col]
+        kind = series.dtype.kind
+        if kind == 'b':
+            schema["dtype"][col] = "bool"
+        elif kind in 'iu':
+            # Integers are parsed at full width and downcast once the real
+            # min/max are known, so a value outside the sample can't overflow
+            schema["dtype"][col] = "int64"
+            schema["downcast"][col] = "integer"
+        elif kind == 'f':
+            schema["dtype"][col] = "float64"
+            schema["downcast"][col] = "float"
+        elif kind == 'M':
+            schema["parse_dates"].append(col)
+        elif kind in 'OUT' or str(series.dtype) in ('str', 'string'):
+            values = series.dropna()
+            if len(values) and values.astype(str).str.match(_DATE_LIKE).all():
+                parsed = pd.to_datetime(values, errors='coerce', format='ISO8601')
+                if parsed.notna().all():
+                    schema["parse_dates"].append(col)
+                    continue
+            if len(values) and values.nunique() <= CATEGORY_MAX_RATIO * len(values):
+                schema["dtype"][col] = "category"
+    return schema
+
+def infer_csv_schema(source, sample_rows=SCHEMA_SAMPLE_ROWS):
+    """Infers a compact-dtype schema from the first rows of a CSV path or buffer."""
+    return schema_from_frame(pd.read_csv(source, nrows=sample_rows))
+
+def _apply_downcasts(df, schema):
+    for col, how in schema.get("downcast", {}).items():
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if how == "integer" and series.dtype.kind in 'iu' and len(series):
+            df[col] = pd.to_numeric(series, downcast="unsigned" if series.min() >= 0 else "integer")
+        elif how == "float" and series.dtype.kind == 'f':
+            small = series.astype('float32')
+            # Only when every value survives the round trip exactly
+            if (small.astype('float64') == series)[series.notna()].all():
+                df[col] = small
+    return df
+
+def load_schema(path, sample_rows=SCHEMA_SAMPLE_ROWS):
+    """Cached schema for a CSV file, inferred and saved on first use."""
+    schema_path = sidecar_path(path, "schema")
+    try:
+        with open(schema_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    schema = infer_csv_schema(path, sample_rows)
+    save_schema(path, schema)
+    return schema
+
+def save_schema(path, schema):
+    with atomic_write(sidecar_path(path, "schema")) as f:
+        json.dump(schema, f, indent=4)
+
+def read_csv_typed(source, schema):
+    """pd.read_csv with a schema's dtypes, falling back to plain inference.
+
+    If the sample-based schema doesn't fit the whole file (e.g. text found
+    in a numeric column) the file is parsed without it, the schema is
+    re-derived from the full data and, for files, saved for next time.
+    """
+    if not schema:
+        return pd.read_csv(source)
+    start = source.tell() if hasattr(source, 'tell') else None
+    try:
+        df = pd.read_csv(source, dtype=schema["dtype"], parse_dates=schema["parse_dates"] or False,
+                         date_format='ISO8601')
+    except (ValueError, TypeError, OverflowError):
+        if start is not None:
+            source.seek(start)
+        df = pd.read_csv(source)
+        schema = schema_from_frame(df)
+        for col in schema["parse_dates"]:
+            df[col] = pd.to_datetime(df[col], format='ISO8601')
+        for col, dtype in schema["dtype"].items():
+            df[col] = df[col].astype(dtype)
+        if isinstance(source, str):
+            save_schema(source, schema)
+    return _apply_downcasts(df, schema)
+
+@instrumented("schema_report")
+def schema_report(files=None):
+    """Memory footprint of each CSV loaded plainly vs. with its inferred schema.
+
+    `files` defaults to every CSV in the forge. Returns (message, rows) with
+    one dict per file: file, rows, before/after bytes and percent saved.
+    """
+    names = files if files is not None else list_all_files("*.csv")
+    report = []
+    try:
+        for name in names:
+            path = get_file_path(name)
+            plain = pd.read_csv(path)
+            typed = read_csv_typed(path, load_schema(path))
+            before = int(plain.memory_usage(index=True, deep=True).sum())
+            after = int(typed.memory_usage(index=True, deep=True).sum())
+            report.append({
+                "file": name,
+                "rows": len(typed),
+                "before": human_size(before),
+                "after": human_size(after),
+                "saved %": round(100 * (1 - after / before), 1) if before else 0.0,
+            })
+    except Exception as e:
+        return f"❌ Error: {str(e)}", report
+    return f"📐 Schema report for {len(report)} CSV file(s).", report
+
+# --- 10. APPEND SERVICE ---
+# Many writers appending to the same files (Streamlit sessions, scripts) each
+# paid an open/write/close per call and could interleave. The service queues
+# appends and a single writer thread coalesces everything queued while the
+# previous write was in progress, plus anything arriving within
+# `flush_interval`, into one locked write per file (group commit).
+APPEND_FLUSH_INTERVAL = float(os.environ.get("FORGE_APPEND_FLUSH_MS", "0")) / 1000
+APPEND_MAX_BATCH = 10000
+# "batch": fsync every group commit before acknowledging it (durable appends)
+# "flush": fsync only on flush()/close()
+# "never": leave it to the OS, like the per-call path
+FSYNC_POLICIES = ("batch", "flush", "never")
+APPEND_FSYNC = os.environ.get("FORGE_FSYNC", "never")
+
+class AppendService:
+    """Group-commit append pipeline with a single writer thread."""
+
+    def __init__(self, flush_interval=APPEND_FLUSH_INTERVAL, fsync=APPEND_FSYNC, max_batch=APPEND_MAX_BATCH):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, not {fsync!r}")
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_batch = max_batch
+        self.stats = {"appends": 0, "batches": 0, "writes": 0, "fsyncs": 0}
+        self._queue = queue.Queue()
+        self._dirty = set()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="forge-append", daemon=True)
+        self._thread.start()
+
+    def submit(self, path, chunk, kind, message):
+        """Queues an encoded append; the Future resolves to the status message."""
+        if self._closed:
+            raise RuntimeError("AppendService is closed")
+        future = Future()
+        self._queue.put((path, chunk, kind, message, future))
+        return future
+
+    def flush(self, timeout=None):
+        """Blocks until everything queued so far has been written."""
+        future = Future()
+        self._queue.put(("flush", None, None, None, future))
+        future.result(timeout)
+
+    def close(self, timeout=None):
+        """Writes out pending appends and stops the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        future = Future()
+        self._queue.put(("stop", None, None, None, future))
+        future.result(timeout)
+        self._thread.join(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch and batch[-1][1] is not None:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            pending = OrderedDict()
+            for path, chunk, kind, message, future in batch:
+                if chunk is not None:
+                    pending.setdefault(path, (kind, []))[1].append((chunk, message, future))
+            self._commit(pending)
+            path, _, _, _, future = batch[-1]
+            if batch[-1][1] is None:
+                # flush/stop markers only ever end a batch
+                self._sync_dirty()
+                future.set_result(None)
+                if path == "stop":
+                    return
+
+    def _commit(self, pending):
+        if pending:
+            self.stats["batches"] += 1
+        for path, (kind, items) in pending.items():
+            try:
+                append_chunks(path, [chunk for chunk, _, _ in items], kind, fsync=self.fsync == "batch")
+                _after_append(path)
+                self.stats["writes"] += 1
+                self.stats["appends"] += len(items)
+                if self.fsync == "batch":
+                    self.stats["fsyncs"] += 1
+                elif self.fsync == "flush":
+                    self._dirty.add(path)
+                results = [message for _, message, _ in items]
+            except Exception as e:
+                results = [f"❌ Error: {str(e)}"] * len(items)
+            for (_, _, future), result in zip(items, results):
+                future.set_result(result)
+
+    def _sync_dirty(self):
+        for path in self._dirty:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+                self.stats["fsyncs"] += 1
+            finally:
+                os.close(fd)
+        self._dirty.clear()
+
+_APPEND_SERVICE = None
+_APPEND_SERVICE_LOCK = threading.Lock()
+
+def append_service(**config):
+    """The shared AppendService, started on first use.
+
+    Passing settings (flush_interval, fsync, max_batch) replaces the running
+    service after draining it.
+    """
+    global _APPEND_SERVICE
+    with _APPEND_SERVICE_LOCK:
+        if _APPEND_SERVICE is not None and config:
+            _APPEND_SERVICE.close()
+            _APPEND_SERVICE = None
+        if _APPEND_SERVICE is None:
+            _APPEND_SERVICE = AppendService(**config)
+        return _APPEND_SERVICE
+
+@atexit.register
+def _close_append_service():
+    if _APPEND_SERVICE is not None:
+        _APPEND_SERVICE.close()
+
+# --- 11. UPLOADS ---
+# Uploads are copied into the forge one chunk at a time (hashing as they go)
+# and everything after that - previews, conversions - works from disk.
+PREVIEW_ROWS = 100
+
+@instrumented("ingest_upload")
+def ingest_upload(fileobj, filename, overwrite=False, chunk_size=STREAM_BUFFER):
+    """Copies an uploaded file object into the forge in fixed-size chunks.
+
+    The SHA-256 is computed while copying, so no more than one chunk is ever
+    held. Compressed uploads (.gz/.bz2/.xz) are stored as they are.
+    Returns (message, info) with info = {name, path, bytes, sha256, seconds}.
+    """
+    name = os.path.basename(filename)
+    if not name:
+        return "Error: Upload has no file name!", None
+    path = get_file_path(name)
+    if os.path.exists(path) and not overwrite:
+        return f"Error: '{name}' already exists in the forge!", None
+
+    digest = hashlib.sha256()
+    size = 0
+    start = time.perf_counter()
+    try:
+        if hasattr(fileobj, 'seek'):
+            fileobj.seek(0)
+        with atomic_write(path, 'wb', codec='') as out:
+            while True:
+                chunk = fileobj.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except Exception as e:
+        return f"❌ Error: {str(e)}", None
+    info = {"name": name, "path": path, "bytes": size, "sha256": digest.hexdigest(),
+            "seconds": time.perf_counter() - start, "deduplicated": False}
+    record_io(bytes_written=size)
+    try:
+        _save_digest(path, info["sha256"])
+        if DEDUP_ENABLED:
+            info["deduplicated"] = dedup_file(name) > 0
+    except OSError:
+        pass  # e.g. no hardlinks on this filesystem; the copy is still saved
+    note = ", identical to a stored file" if info["deduplicated"] else ""
+    return f"📥 Saved '{name}' ({human_size(size)}{note})", info
+
+@instrumented("preview_file")
+def preview_file(filename, rows=PREVIEW_ROWS, as_frame=False):
+    """First `rows` records of a forge file, without reading the rest.
+
+    Returns (message, data): a list of records for CSV/JSON/JSONL (parsed
+    with the csv module, so pandas isn't loaded) and a string of lines for
+    anything else. as_frame=True returns CSV previews as a typed DataFrame.
+    """
+    path = get_file_path(filename)
+    if not os.path.exists(path):
+        return "Error: File not found!", None
+    ext = base_ext(filename)
+    try:
+        if ext == '.csv' and as_frame:
+            data = pd.read_csv(path, nrows=rows)
+            count = len(data)
+        elif ext in RECORD_FORMATS:
+            data = list(islice(stream_records(filename), rows))
+            count = len(data)
+        else:
+            with open_forge(path, 'rb') as f:
+                lines = list(islice(f, rows))
+            data = b"".join(lines).decode('utf-8', errors='replace')
+            count = len(lines)
+        record_io(rows=count)
+        return f"Previewing the first {count:,} row(s)", data
+    except Exception as e:
+        return f"Error: {str(e)}", None
+
+# --- 12. DOWNLOADS ---
+# Converted downloads are written once into a SpooledTemporaryFile: it stays
+# in memory up to SPOOL_MAX_BYTES (env FORGE_SPOOL_MB) and rolls over to a
+# temp file beyond that, so the output is never copied between buffers.
+SPOOL_MAX_BYTES = int(os.environ.get("FORGE_SPOOL_MB", "32")) * 1024 * 1024
+
+def write_spooled(write, newline=None, max_memory=SPOOL_MAX_BYTES):
+    """Calls write(text_stream) on a spooled temp file.
+
+    Returns (spool, result): the binary spool rewound for reading (close it
+    when done) and whatever `write` returned.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    text = io.TextIOWrapper(spool, encoding='utf-8', newline=newline)
+    try:
+        result = write(text)
+        text.flush()
+    except BaseException:
+        spool.close()
+        raise
+    text.detach()
+    spool.seek(0)
+    return spool, result
+
+@instrumented("export_converted")
+def export_converted(filename, target=None, indent=4, max_memory=SPOOL_MAX_BYTES, nested=False):
+    """Converts a forge file for download without touching the forge.
+
+    Same formats, targets and options as convert_csv_json. The output is
+    uncompressed and named download_name(filename, target).
+    Returns (message, spool) with the spool rewound; close it when done.
+    A cached result comes back as an open file instead of a spool.
+    """
+    path = get_file_path(filename)
+    if not os.path.exists(path):
+        return "Error: File not found!", None
+    new_name = converted_name(filename, target)
+    if new_name is None:
+        return "Error: Only CSV, JSON or JSONL conversions allowed!", None
+    src_ext, dst_ext = base_ext(filename), base_ext(new_name)
+
+    def convert(out):
+        with open_forge(path, 'rb') as src:
+            return convert_records(src, src_ext, out, dst_ext, indent, nested)
+
+    try:
+        start = time.perf_counter()
+        key = None
+        if CONVERSION_CACHE_BYTES:
+            key = conversion_key(file_digest(filename), src_ext + compression_of(filename), dst_ext,
+                                 indent=indent, nested=nested)
+            cached = cache_open(key)
+            if cached is not None:
+                size = os.fstat(cached.fileno()).st_size
+                return f"✅ Converted to '{download_name(filename, target)}' (cached, {human_size(size)})", cached
+        spool, rows = write_spooled(convert, '' if dst_ext == '.csv' else None, max_memory)
+    except Exception as e:
+        return f"❌ Error: {str(e)}", None
+    if rows == 0 and dst_ext == '.csv':
+        spool.close()
+        return "Error: No records to convert!", None
+    size = spool.seek(0, os.SEEK_END)
+    spool.seek(0)
+    if key and size <= CONVERSION_CACHE_BYTES:
+        cache_store(key, fileobj=spool)
+    record_io(bytes_read=os.path.getsize(path), rows=rows)
+    return f"✅ Converted to '{download_name(filename, target)}' ({rate_summary(rows, size, time.perf_counter() - start)})", spool
+
+@instrumented("export_upload")
+def export_upload(fileobj, filename, target=None, indent=4, max_memory=SPOOL_MAX_BYTES, nested=False):
+    """Converts an uploaded binary file object for download without storing it.
+
+    `filename` is the upload's name, which gives its format and codec;
+    compressed uploads are decompressed on the fly. Same targets and options
+    as export_converted. Returns (message, spool) with the spool rewound.
+    """
+    new_name = converted_name(os.path.basename(filename), target)
+    if new_name is None:
+        return "Error: Only CSV, JSON or JSONL conversions allowed!", None
+    src_ext, dst_ext = base_ext(filename), base_ext(new_name)
+    module = CODECS.get(compression_of(filename))
+
+    def convert(out):
+        if module is None:
+            return convert_records(fileobj, src_ext, out, dst_ext, indent, nested)
+        with module.open(fileobj, 'rb') as src:
+            return convert_records(src, src_ext, out, dst_ext, indent, nested)
+
+    try:
+        start = time.perf_counter()
+        if hasattr(fileobj, 'seek'):
+            fileobj.seek(0)
+        spool, rows = write_spooled(convert, '' if dst_ext == '.csv' else None, max_memory)
+    except Exception as e:
+        return f"❌ Error: {str(e)}", None
+    if rows == 0 and dst_ext == '.csv':
+        spool.close()
+        return "Error: No records to convert!", None
+    size = spool.seek(0, os.SEEK_END)
+    spool.seek(0)
+    record_io(rows=rows)
+    return f"✅ Converted to '{download_name(filename, target)}' ({rate_summary(rows, size, time.perf_counter() - start)})", spool
+
+def download_name(filename, target=None):
+    """File name export_converted's output should be saved under."""
+    new_name = converted_name(os.path.basename(filename), target)
+    return split_codec(new_name)[0] if new_name else None
+
+# --- 13. CONTENT STORE ---
+# Files are identified by the SHA-256 of their bytes, cached in a ".sha"
+# sidecar until the file changes. Identical files are hardlinked to one blob
+# in WORK_DIR/.blobs, and conversion outputs are cached in WORK_DIR/.cache
+# keyed by (source hash, target, options), so repeat conversions are a link
+# or a copy. Anything that writes a file in place calls break_link first, so
+# a shared blob or cache entry never changes under another name.
+DEDUP_ENABLED = os.environ.get("FORGE_DEDUP", "1") != "0"
+CONVERSION_CACHE_BYTES = int(os.environ.get("FORGE_CACHE_MB", "512")) * 1024 * 1024  # 0 disables
+CONVERSION_CACHE_AGE = float(os.environ.get("FORGE_CACHE_DAYS", "7")) * 86400
+_CONVERSION_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+_CONVERSION_CACHE_LOCK = threading.Lock()
+
+def sha256_of(path, chunk_size=STREAM_BUFFER):
+    """SHA-256 hex digest of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return digest.hexdigest()
+            digest.update(chunk)
+
+def _save_digest(path, digest):
+    info = os.stat(path)
+    with atomic_write(sidecar_path(path, "sha")) as f:
+        json.dump({"size": info.st_size, "mtime_ns": info.st_mtime_ns, "sha256": digest}, f)
+
+def file_digest(filename):
+    """SHA-256 of a forge file, hashed once and cached until the file changes."""
+    path = get_file_path(filename)
+    info = os.stat(path)
+    try:
+        with open(sidecar_path(path, "sha")) as f:
+            saved = json.load(f)
+        if [saved["size"], saved["mtime_ns"]] == [info.st_size, info.st_mtime_ns]:
+            return saved["sha256"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+    digest = sha256_of(path)
+    record_io(bytes_read=info.st_size)
+    _save_digest(path, digest)
+    return digest
+
+def break_link(path):
+    """Gives `path` its own copy of its data if it is hardlinked elsewhere.
+
+    Call before writing a forge file in place (appends, patches). The copy
+    keeps the file's mtime, so checkpoints and "up to date" checks hold.
+    """
+    try:
+        if os.stat(path).st_nlink < 2:
+            return False
+    except FileNotFoundError:
+        return False
+    tmp = path + ".part"
+    shutil.copy2(path, tmp)
+    os.replace(tmp, path)
+    return True
+
+def blob_path(digest):
+    return os.path.join(WORK_DIR, ".blobs", digest[:2], digest)
+
+def dedup_file(filename):
+    """Hardlinks a forge file to the blob holding the same bytes.
+
+    The first file with given content becomes the blob; later copies are
+    replaced by links to it and take on its mtime. Timestamps are left
+    alone: the inode is shared, so touching one file would touch every
+    twin and make their converted outputs look stale. Returns the bytes saved.
+    """
+    path = get_file_path(filename)
+    digest = file_digest(filename)
+    blob = blob_path(digest)
+    with open(path, 'rb') as f, file_lock(f):  # no append can slip in meanwhile
+        info = os.fstat(f.fileno())
+        if file_digest(filename) != digest:
+            return 0  # changed since it was hashed
+        try:
+            stored = os.stat(blob)
+        except FileNotFoundError:
+            stored = None
+        if stored is not None and stored.st_ino == info.st_ino:
+            return 0
+        ensure_parent(blob)
+        if stored is None or stored.st_size != info.st_size:
+            os.link(path, blob + ".part")
+            os.replace(blob + ".part", blob)
+            return 0
+        os.link(blob, path + ".part")
+        os.replace(path + ".part", path)
+    _save_digest(path, digest)
+    invalidate_listing()
+    invalidate_read_cache(path)
+    return info.st_size
+
+def gc_blobs():
+    """Removes blobs no forge file links to any more. Returns (blobs, bytes) freed."""
+    freed = count = 0
+    root = os.path.join(WORK_DIR, ".blobs")
+    if not os.path.isdir(root):
+        return 0, 0
+    for folder in os.scandir(root):
+        if not folder.is_dir():
+            continue
+        for entry in os.scandir(folder.path):
+            info = entry.stat()
+            if info.st_nlink == 1:
+                os.remove(entry.path)
+                freed += info.st_size
+                count += 1
+    return count, freed
+
+@instrumented("dedup_forge")
+def dedup_forge():
+    """Hashes every forge file, links duplicates to shared blobs and drops unused blobs.
+
+    Returns (message, stats) with stats = {files, saved, blobs_freed}.
+    """
+    saved = 0
+    try:
+        names = list_all_files()
+        for name in names:
+            saved += dedup_file(name)
+        blobs, _ = gc_blobs()
+    except Exception as e:
+        return f"❌ Error: {str(e)}", None
+    return (f"🧬 Checked {len(names):,} files, {human_size(saved)} saved by deduplication.",
+            {"files": len(names), "saved": saved, "blobs_freed": blobs})
+
+# Conversion cache entries are plain files named by their key. Last use is
+# tracked in the entry's atime (set explicitly), because a cached output
+# that is hardlinked into the forge gets its mtime from the source.
+def conversion_cache_dir():
+    return os.path.join(WORK_DIR, ".cache")
+
+def conversion_key(digest, source, target, **options):
+    """Cache key for converting content `digest` read as `source` to `target` with `options`.
+
+    `source` and `target` are format plus codec, e.g. '.csv.gz': the same
+    bytes convert differently as CSV and as JSON Lines.
+    """
+    return hashlib.sha256(json.dumps([digest, source, target, options], sort_keys=True).encode()).hexdigest()
+
+def _touch_atime(path):
+    os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+
+def cache_fetch(key, dst_path):
+    """Puts the cached output for `key` at dst_path. Returns False on a miss.
+
+    The entry is hardlinked when nothing else links to it, copied otherwise.
+    """
+    entry = os.path.join(conversion_cache_dir(), key)
+    try:
+        linked = os.stat(entry).st_nlink > 1
+    except FileNotFoundError:
+        with _CONVERSION_CACHE_LOCK:
+            _CONVERSION_CACHE_STATS["misses"] += 1
+        return False
+    tmp = dst_path + ".part"
+    ensure_parent(dst_path)
+    try:
+        if linked:
+            raise OSError("entry already in use")
+        os.link(entry, tmp)
+    except OSError:
+        shutil.copyfile(entry, tmp)
+    os.replace(tmp, dst_path)
+    drop_sidecars(dst_path)
+    invalidate_listing()
+    invalidate_read_cache(dst_path)
+    _touch_atime(entry)
+    with _CONVERSION_CACHE_LOCK:
+        _CONVERSION_CACHE_STATS["hits"] += 1
+    return True
+
+def cache_open(key):
+    """Cached output for `key` opened for reading, or None on a miss."""
+    entry = os.path.join(conversion_cache_dir(), key)
+    try:
+        f = open(entry, 'rb')
+    except FileNotFoundError:
+        with _CONVERSION_CACHE_LOCK:
+            _CONVERSION_CACHE_STATS["misses"] += 1
+        return None
+    _touch_atime(entry)
+    with _CONVERSION_CACHE_LOCK:
+        _CONVERSION_CACHE_STATS["hits"] += 1
+    return f
+
+def cache_store(key, src=None, fileobj=None):
+    """Adds an output to the cache: a file path (hardlinked if possible) or a binary file object."""
+    entry = os.path.join(conversion_cache_dir(), key)
+    tmp = entry + ".part"
+    ensure_parent(entry)
+    if fileobj is not None:
+        start = fileobj.tell()
+        with open(tmp, 'wb') as out:
+            shutil.copyfileobj(fileobj, out, STREAM_BUFFER)
+        fileobj.seek(start)
+    else:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+    os.replace(tmp, entry)
+    _touch_atime(entry)
+    evict_conversion_cache()
+
+def _cache_entries():
+    folder = conversion_cache_dir()
+    if not os.path.isdir(folder):
+        return []
+    with os.scandir(folder) as it:
+        return [(e.path, e.stat()) for e in it if e.is_file() and not e.name.endswith(".part")]
+
+def evict_conversion_cache(max_bytes=None, max_age=None):
+    """Drops entries unused for max_age seconds, then least recently used ones over max_bytes.
+
+    Defaults are CONVERSION_CACHE_BYTES and CONVERSION_CACHE_AGE. Returns the number removed.
+    """
+    max_bytes = CONVERSION_CACHE_BYTES if max_bytes is None else max_bytes
+    max_age = CONVERSION_CACHE_AGE if max_age is None else max_age
+    entries = sorted(_cache_entries(), key=lambda e: e[1].st_atime)
+    total = sum(info.st_size for _, info in entries)
+    cutoff = time.time() - max_age
+    removed = 0
+    for path, info in entries:
+        if info.st_atime >= cutoff and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= info.st_size
+        removed += 1
+    with _CONVERSION_CACHE_LOCK:
+        _CONVERSION_CACHE_STATS["evictions"] += removed
+    return removed
+
+def conversion_cache_stats():
+    entries = _cache_entries()
+    with _CONVERSION_CACHE_LOCK:
+        stats = dict(_CONVERSION_CACHE_STATS)
+    stats.update(entries=len(entries), bytes=sum(info.st_size for _, info in entries))
+    return stats
+
+def clear_conversion_cache():
+    return evict_conversion_cache(max_bytes=0)
+
+# --- 14. QUERIES ---
+# query_file streams a CSV/JSON/JSONL file and keeps only the requested
+# columns of rows that match every condition, so a file never has to fit in
+# memory. CSV rows are tested as raw field lists and only matches become
+# dicts; JSON records can be queried by dotted names ("user.address.city").
+# Numbers compare numerically, everything else as text.
+QUERY_OPS = ("==", "!=", ">=", "<=", ">", "<", "contains", "startswith", "endswith", "in")
+_COMPARE = {"==": operator.eq, "!=": operator.ne, ">=": operator.ge, "<=": operator.le,
+            ">": operator.gt, "<": operator.lt}
+_WHERE_CLAUSE = re.compile(r'^\s*(.+?)\s*(==|!=|>=|<=|=|>|<|\s(?:contains|startswith|endswith|in)\s)\s*(.*?)\s*$',
+                           re.IGNORECASE)
+
+def _query_value(text):
+    """'30' -> 30, 'true' -> True, '"30"' -> '30', 'Paris' -> 'Paris'."""
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"":
+        return text[1:-1]
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+def _split_unquoted(text, separator):
+    """re.split on `separator` everywhere except inside '...' or "..." values."""
+    parts, start = [], 0
+    for match in re.finditer(r"""("[^"]*"|'[^']*')|""" + separator, text, re.IGNORECASE):
+        if match.group(1) is None:
+            parts.append(text[start:match.start()])
+            start = match.end()
+    parts.append(text[start:])
+    return parts
+
+def parse_where(text):
+    """Parses "age >= 30 and city == Paris" into [(column, op, value), ...].
+
+    Conditions are joined with "and"; '=' means '=='; "in" takes a
+    comma-separated list. Quote a value to keep "and" or commas in it.
+    Raises ValueError on anything else.
+    """
+    conditions = []
+    if not text.strip():
+        return conditions
+    for clause in _split_unquoted(text.strip(), r'\s*(?<!\S)and(?!\S)\s*'):
+        if not clause:
+            raise ValueError(f"'and' needs a condition on both sides in '{text.strip()}'")
+        match = _WHERE_CLAUSE.match(clause)
+        if not match:
+            raise ValueError(f"Can't read the condition '{clause}'")
+        column, op, value = match.group(1), match.group(2).strip().lower(), match.group(3)
+        if op == "=":
+            op = "=="
+        value = [_query_value(v.strip()) for v in _split_unquoted(value, ",")] if op == "in" else _query_value(value)
+        conditions.append((column, op, value))
+    return conditions
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value if isinstance(value, str) else str(value)
+
+def _predicate(op, value):
+    """Test for one condition: field value -> bool."""
+    if op == "in":
+        tests = [_predicate("==", v) for v in value]
+        return lambda x: any(test(x) for test in tests)
+    if op in ("contains", "startswith", "endswith"):
+        needle = _text(value)
+        method = {"contains": str.__contains__, "startswith": str.startswith, "endswith": str.endswith}[op]
+        return lambda x: method(_text(x), needle)
+    if op not in _COMPARE:
+        raise ValueError(f"Unknown operator '{op}' (use one of {', '.join(QUERY_OPS)})")
+    compare = _COMPARE[op]
+    number = _number(value)
+    text = _text(value)
+    if number is None:
+        return lambda x: compare(_text(x), text)
+    if op in ("==", "!="):
+        def test(x):
+            n = _number(x)
+            return compare(_text(x), text) if n is None else compare(n, number)
+    else:
+        def test(x):
+            n = _number(x)
+            return n is not None and compare(n, number)
+    return test
+
+def _query_csv(path, columns, conditions, limit):
+    """(matches, rows scanned, stopped early) for a CSV file."""
+    matches, scanned = [], 0
+    with open_forge(path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        position = {name: i for i, name in reversed(list(enumerate(header)))}
+        unknown = [c for c in (columns or []) + [c for c, _, _ in conditions] if c not in position]
+        if unknown:
+            raise KeyError(", ".join(dict.fromkeys(unknown)))
+        keep = [(name, position[name]) for name in (columns or header)]
+        tests = [(position[c], _predicate(op, v)) for c, op, v in conditions]
+        for row in reader:
+            if not row:
+                continue
+            scanned += 1
+            width = len(row)
+            for i, test in tests:
+                if not test(row[i] if i < width else None):
+                    break
+            else:
+                matches.append({name: row[i] if i < width else None for name, i in keep})
+                if limit and len(matches) >= limit:
+                    return matches, scanned, True
+    return matches, scanned, False
+
+def _query_records(filename, columns, conditions, limit):
+    """(matches, rows scanned, stopped early) for a JSON/JSONL file."""
+    names = (columns or []) + [c for c, _, _ in conditions]
+    flatten = any(FLATTEN_SEP in name for name in names)
+    tests = [(c, _predicate(op, v)) for c, op, v in conditions]
+    matches, scanned = [], 0
+    records = stream_records(filename)
+    try:
+        for record in records:
+            scanned += 1
+            if not isinstance(record, dict):
+                continue
+            if flatten:
+                record = flatten_record(record)
+            if all(test(record.get(c)) for c, test in tests):
+                matches.append({c: record.get(c) for c in columns} if columns else record)
+                if limit and len(matches) >= limit:
+                    return matches, scanned, True
+    finally:
+        records.close()
+    return matches, scanned, False
+
+@instrumented("query_file")
+def query_file(filename, columns=None, where=None, limit=None):
+    """Selected columns of the rows matching `where`, evaluated while streaming.
+
+    `columns` is a list of names (None for all). `where` is a list of
+    (column, op, value) conditions that must all hold, or a string such as
+    "age >= 30 and city == Paris" (see parse_where); ops are QUERY_OPS.
+    The scan stops as soon as `limit` rows matched.
+    Returns (message, rows) with rows a list of dicts.
+    """
+    path = get_file_path(filename)
+    if not os.path.exists(path):
+        return "Error: File not found!", None
+    ext = base_ext(filename)
+    if ext not in RECORD_FORMATS:
+        return "Error: Queries work on CSV, JSON and JSONL files!", None
+    try:
+        conditions = parse_where(where) if isinstance(where, str) else list(where or [])
+        columns = list(columns) if columns else None
+        start = time.perf_counter()
+        if ext == '.csv':
+            matches, scanned, stopped = _query_csv(path, columns, conditions, limit)
+        else:
+            matches, scanned, stopped = _query_records(filename, columns, conditions, limit)
+    except KeyError as e:
+        return f"Error: Unknown column(s): {e.args[0]}", None
+    except Exception as e:
+        return f"❌ Error: {str(e)}", None
+    record_io(rows=len(matches))
+    note = ", stopped at the limit" if stopped else ""
+    return (f"🔎 {len(matches):,} matching row(s) from {scanned:,} scanned in "
+            f"{time.perf_counter() - start:.2f}s{note}"), matches
+
+# --- 15. COLUMN PROFILES ---
+# profile_file summarizes every column of a CSV/JSON/JSONL file in one
+# streaming pass, a batch of rows at a time, with fixed memory per column:
+# mean/stddev merged batch by batch (Welford/Chan), distinct values from a
+# HyperLogLog sketch and top values from a space-saving counter table. The
+# result and the sketches are kept in a ".prof" sidecar: an unchanged file is
+# answered from it, and after an append only the new rows are read.
+PROFILE_BATCH_ROWS = 10000
+HLL_BITS = 12  # 4096 registers, ~1.6% standard error
+TOP_VALUES = 10
+TOP_CAPACITY = 256  # counters kept per column (pruned from 2x this)
+NULL_VALUES = frozenset(["", "NA", "N/A", "NaN", "nan", "null", "NULL", "None"])
+
+def _hll_hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'big')
+
+def _hll_estimate(registers):
+    m = len(registers)
+    estimate = (0.7213 / (1 + 1.079 / m)) * m * m / math.fsum(n * 2.0 ** -r for r, n in Counter(registers).items())
+    zeros = registers.count(0)
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)  # linear counting for small sets
+    return int(round(estimate))
+
+def _cell_text(value):
+    """A JSON value as the text a CSV cell would hold (None stays None)."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, dict)):
+        return _encode_cell(value)
+    return str(value)
+
+class ColumnStats:
+    """Streaming statistics for one column, fed a batch of text values at a time."""
+
+    def __init__(self, name, nulls=0):
+        self.name = name
+        self.count = 0
+        self.nulls = nulls
+        self.numeric = True  # until a non-null value fails to parse
+        self.integral = True
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.low = self.high = None  # numeric range
+        self.first = self.last = None  # text range
+        self.registers = bytearray(1 << HLL_BITS)
+        self.top = {}  # value -> [count, overcount]
+        self.floor = 0  # largest count evicted from self.top
+
+    def add(self, values):
+        present = [v for v in values if v is not None and v not in NULL_VALUES]
+        self.nulls += len(values) - len(present)
+        if not present:
+            return
+        self.count += len(present)
+        first, last = min(present), max(present)
+        self.first = first if self.first is None else min(self.first, first)
+        self.last = last if self.last is None else max(self.last, last)
+        if self.numeric:
+            try:
+                numbers = list(map(float, present))
+            except ValueError:
+                self.numeric = False
+            else:
+                self._add_numbers(numbers)
+        counts = Counter(present)
+        self._add_distinct(counts)
+        self._add_top(counts)
+
+    def _add_numbers(self, xs):
+        n = len(xs)
+        mean = math.fsum(xs) / n
+        m2 = math.fsum((x - mean) ** 2 for x in xs)
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+        low, high = min(xs), max(xs)
+        self.low = low if self.low is None else min(self.low, low)
+        self.high = high if self.high is None else max(self.high, high)
+        if self.integral:
+            self.integral = all(map(float.is_integer, xs))
+
+    def _add_distinct(self, counts):
+        registers = self.registers
+        shift = 64 - HLL_BITS
+        mask = (1 << shift) - 1
+        for value in counts:
+            h = _hll_hash(value)
+            rank = shift - (h & mask).bit_length() + 1
+            i = h >> shift
+            if rank > registers[i]:
+                registers[i] = rank
+
+    def _add_top(self, counts):
+        top = self.top
+        for value, n in counts.items():
+            entry = top.get(value)
+            if entry is None:
+                # space-saving: a newcomer may have been evicted before, up to `floor` times
+                top[value] = [self.floor + n, self.floor]
+            else:
+                entry[0] += n
+        if len(top) > 2 * TOP_CAPACITY:
+            self._prune()
+
+    def _prune(self):
+        ranked = sorted(self.top.items(), key=lambda item: item[1][0], reverse=True)
+        if len(ranked) > TOP_CAPACITY:
+            self.floor = max(self.floor, ranked[TOP_CAPACITY][1][0])
+        self.top = dict(ranked[:TOP_CAPACITY])
+
+    def summary(self):
+        numeric = self.numeric and self.count > 0
+        std = math.sqrt(self.m2 / (self.n - 1)) if numeric and self.n > 1 else None
+        # (value, guaranteed count) for values surely seen more often than anything evicted;
+        # a newcomer's count includes the `floor` it may have been evicted with
+        top = sorted(((v, c - over) for v, (c, over) in self.top.items() if c - over > self.floor),
+                     key=operator.itemgetter(1), reverse=True)[:TOP_VALUES]
+        def number(x):
+            return int(x) if self.integral and x is not None and x.is_integer() else x
+        return {
+            "column": self.name,
+            "type": ("integer" if self.integral else "number") if numeric else ("text" if self.count else "empty"),
+            "count": self.count,
+            "nulls": self.nulls,
+            "distinct": min(_hll_estimate(self.registers), self.count) if self.count else 0,
+            "min": number(self.low) if numeric else self.first,
+            "max": number(self.high) if numeric else self.last,
+            "mean": self.mean if numeric else None,
+            "std": std,
+            "top": top,
+        }
+
+    def to_state(self):
+        self._prune()
+        state = dict(vars(self))
+        state["registers"] = base64.b64encode(self.registers).decode('ascii')
+        state["top"] = list(self.top.items())
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls(state["name"])
+        vars(stats).update(state)
+        stats.registers = bytearray(base64.b64decode(state["registers"]))
+        stats.top = dict(state["top"])
+        return stats
+
+def _profile_csv_rows(src, fieldnames, columns, rows):
+    """Feeds CSV rows to the column stats. Returns (fieldnames, total rows)."""
+    reader = csv.reader(io.TextIOWrapper(src))
+    if fieldnames is None:
+        fieldnames = next(reader, None) or []
+        columns.extend(ColumnStats(name) for name in fieldnames)
+    while True:
+        chunk = list(islice(reader, PROFILE_BATCH_ROWS))
+        if not chunk:
+            return fieldnames, rows
+        batch = [row for row in chunk if row]
+        if not batch:
+            continue
+        rows += len(batch)
+        cells = list(zip_longest(*batch))  # short rows are padded with None
+        for i, stats in enumerate(columns):
+            stats.add(cells[i] if i < len(cells) else (None,) * len(batch))
+
+def _profile_records(records, columns, rows):
+    """Feeds JSON records to the column stats, adding columns as they appear. Returns the row count."""
+    index = {stats.name: i for i, stats in enumerate(columns)}
+    while True:
+        batch = [flatten_record(r) if isinstance(r, dict) else {"value": r}
+                 for r in islice(records, PROFILE_BATCH_ROWS)]
+        if not batch:
+            return rows
+        for record in batch:
+            for key in record:
+                if key not in index:
+                    index[key] = len(columns)
+                    columns.append(ColumnStats(key, nulls=rows))
+        rows += len(batch)
+        for stats in columns:
+            name = stats.name
+            stats.add([_cell_text(r.get(name)) for r in batch])
+
+def _load_profile(path):
+    try:
+        with open(sidecar_path(path, "prof")) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+@instrumented("profile_file")
+def profile_file(filename, use_cache=True):
+    """Per-column count, nulls, min/max, mean/std, distinct and top values.
+
+    Reads the file once with bounded memory per column. The result is cached
+    in a sidecar until the file changes; after an append to an uncompressed
+    CSV/JSONL file only the new rows are read. Distinct counts are estimates,
+    and once a column has many values its top-value counts are lower bounds.
+    Returns (message, profile) with profile = {rows, columns: [...]}.
+    """
+    path = get_file_path(filename)
+    if not os.path.exists(path):
+        return "Error: File not found!", None
+    ext = base_ext(filename)
+    if ext not in RECORD_FORMATS:
+        return "Error: Profiles work on CSV, JSON and JSONL files!", None
+    try:
+        start = time.perf_counter()
+        info = os.stat(path)
+        saved = _load_profile(path) if use_cache else None
+        if saved and [saved["size"], saved["mtime_ns"]] == [info.st_size, info.st_mtime_ns]:
+            return (f"📊 {saved['rows']:,} rows × {len(saved['columns'])} columns (cached)",
+                    {"rows": saved["rows"], "columns": saved["columns"]})
+
+        compressed = bool(compression_of(filename))
+        end = info.st_size if compressed else _source_end(path)
+        resume = (saved is not None and not compressed and ext in INCREMENTAL_SOURCES
+                  and saved["offset"] <= end and _source_state(path, saved["offset"]) == saved["state"])
+        if resume:
+            columns = [ColumnStats.from_state(state) for state in saved["stats"]]
+            rows = before = saved["rows"]
+            fieldnames, offset = saved["fieldnames"], saved["offset"]
+        else:
+            columns, rows, before, fieldnames, offset = [], 0, 0, None, 0
+
+        with open_forge(path, 'rb') as raw:
+            src = raw
+            if not compressed:
+                raw.seek(offset)
+                src = io.BufferedReader(_BoundedReader(raw, end), STREAM_BUFFER)
+            if ext == '.csv':
+                fieldnames, rows = _profile_csv_rows(src, fieldnames, columns, rows)
+            else:
+                rows = _profile_records(iter_records(src, ext), columns, rows)
+
+        summaries = [stats.summary() for stats in columns]
+        state = {"size": end, "mtime_ns": info.st_mtime_ns, "offset": end,
+                 "state": None if compressed else _source_state(path, end), "rows": rows,
+                 "fieldnames": fieldnames, "stats": [stats.to_state() for stats in columns], "columns": summaries}
+        with atomic_write(sidecar_path(path, "prof")) as f:
+            f.write(json.dumps(state))  # json.dump would skip the C encoder
+    except Exception as e:
+        return f"❌ Error: {str(e)}", None
+    seconds = time.perf_counter() - start
+    record_io(bytes_read=end - offset, rows=rows - before)
+    if resume:
+        msg = f"📊 {rows:,} rows × {len(columns)} columns (+{rows - before:,} appended rows in {seconds:.2f}s)"
+    else:
+        msg = f"📊 Profiled {rows:,} rows × {len(columns)} columns in {seconds:.2f}s"
+    return msg, {"rows": rows, "columns": summaries}
+
+# --- 16. SORTING ---
+# sort_file orders a CSV/JSON/JSONL file by one or more columns without
+# holding it in memory (an external merge sort): rows are read into runs of
+# about the memory budget, each run is sorted and spilled to a temp file,
+# and the runs are merged with a heap while the output is written. Values
+# compare typed: numbers numerically and before text, empty cells last.
+# The sort is stable, so rows with equal keys keep their file order.
+SORT_MEMORY_BYTES = int(os.environ.get("FORGE_SORT_MB", "64")) * 1024 * 1024
+SORT_MERGE_FANIN = 64  # runs merged at once; more runs take extra merge passes
+SORT_BATCH_ROWS = 10000
+SORT_SAMPLE_ROWS = 500  # rows measured to size a run
+SORT_PARALLEL_MIN = 16 * 1024 * 1024  # smaller files aren't worth a process pool
+
+def parse_sort_spec(by):
+    """'city, age desc' or ['city', 'age desc'] -> [('city', False), ('age', True)].
+
+    List items may also be (column, descending) pairs.
+    """
+    spec = []
+    for item in (by.split(",") if isinstance(by, str) else by or []):
+        if isinstance(item, (tuple, list)):
+            spec.append((item[0], bool(item[1])))
+            continue
+        words = item.strip().rsplit(None, 1)
+        if len(words) == 2 and words[1].lower() in ("asc", "desc"):
+            spec.append((words[0], words[1].lower() == "desc"))
+        elif words:
+            spec.append((item.strip(), False))
+    if not spec:
+        raise ValueError("Name at least one column to sort by")
+    return spec
+
+_EXACT_FLOAT = float(2 ** 53)  # integers below this are exact as floats
+
+def _typed(value, empty):
+    """Sort key for one cell: (0, number), (1, text) or `empty`."""
+    if isinstance(value, str):
+        if value in NULL_VALUES:
+            return empty
+        try:
+            number = float(value)
+        except ValueError:
+            return (1, value)
+        if number != number:
+            return empty
+        if abs(number) >= _EXACT_FLOAT:
+            try:
+                return (0, int(value))  # keep big integers (ids) exact
+            except ValueError:
+                pass
+        return (0, number)
+    if value is None:
+        return empty
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return (1, _cell_text(value))
+    return (0, value) if value == value else empty
+
+class _Descending:
+    """Inverts a key, for the descending columns of a mixed-direction sort."""
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+def _field_getter(column):
+    """Cell getter: an index into a CSV row, or a (dotted) name in a JSON record."""
+    if isinstance(column, int):
+        return lambda row: row[column] if column < len(row) else None
+    path = column.split(FLATTEN_SEP)
+
+    def get(record):
+        if not isinstance(record, dict):
+            return None
+        if column in record or len(path) == 1:
+            return record.get(column)
+        for part in path:
+            record = record.get(part) if isinstance(record, dict) else None
+        return record
+    return get
+
+def _sort_key(columns, descending):
+    """(row -> key, reverse) for CSV column indexes or record field names."""
+    reverse = all(descending)
+    mixed = any(descending) and not reverse
+    parts = []
+    for get, desc in zip(map(_field_getter, columns), descending):
+        # Empty cells go last whichever way the column runs
+        empty = (-1,) if desc else (2,)
+        if mixed and desc:
+            parts.append(lambda row, get=get, empty=empty: _Descending(_typed(get(row), empty)))
+        else:
+            parts.append(lambda row, get=get, empty=empty: _typed(get(row), empty))
+    if len(parts) == 1:
+        return parts[0], reverse
+    return (lambda row: tuple([part(row) for part in parts])), reverse
+
+def _sort_rows(src, ext, skip_header=False):
+    """Rows to sort from an open binary file: CSV field lists or JSON records."""
+    if ext != '.csv':
+        return iter_records(src, ext)
+    reader = csv.reader(io.TextIOWrapper(src, newline=''))
+    if skip_header:
+        next(reader, None)
+    return filter(None, reader)  # blank lines
+
+def _csv_header(path):
+    """(header row, line terminator) of a CSV file."""
+    with open_forge(path, 'rb') as f:
+        line_end = "\r\n" if f.readline().endswith(b"\r\n") else "\n"
+        f.seek(0)
+        return next(csv.reader(io.TextIOWrapper(f, newline='')), []), line_end
+
+def _line_boundaries(path, parts):
+    """Byte offsets that split a JSON Lines file into `parts` ranges of whole lines."""
+    size = os.path.getsize(path)
+    cuts = [0]
+    with open(path, 'rb') as f:
+        for n in range(1, parts):
+            f.seek(max(size * n // parts - 1, cuts[-1]))
+            f.readline()
+            if f.tell() >= size:
+                break
+            if f.tell() > cuts[-1]:
+                cuts.append(f.tell())
+    cuts.append(size)
+    return cuts
+
+def _write_run(items, run_dir, chunk_rows):
+    """Spills (key, row) pairs to a temp file as pickled chunks. Returns its path."""
+    fd, path = tempfile.mkstemp(suffix=".run", dir=run_dir)
+    items = iter(items)
+    with open(fd, 'wb', buffering=STREAM_BUFFER) as f:
+        while True:
+            chunk = list(islice(items, chunk_rows))
+            if not chunk:
+                return path
+            pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+
+def _read_run(path):
+    with open(path, 'rb', buffering=STREAM_BUFFER) as f:
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                return
+            yield from chunk
+
+def _sorted_runs(rows, key, reverse, memory, run_dir, keep_first=False):
+    """Cuts rows into sorted runs of about `memory` bytes spilled to run_dir.
+
+    Run lengths come from measuring a sample of each run's first batch.
+    Runs are written in chunks of 1/SORT_MERGE_FANIN of a run, so merging a
+    full fan-in of them needs about `memory` too. With keep_first, input that
+    fits in a single run stays in memory instead of being spilled.
+    Returns (run paths, row count, in-memory run, chunk rows).
+    """
+    rows = iter(rows)
+    runs, count, chunk_rows = [], 0, SORT_BATCH_ROWS
+    while True:
+        run = [(key(row), row) for row in islice(rows, SORT_BATCH_ROWS)]
+        if not run:
+            return runs, count, [], chunk_rows
+        sample = run[::len(run) // SORT_SAMPLE_ROWS + 1]
+        limit = max(SORT_BATCH_ROWS, memory * len(sample) // estimate_size(sample))
+        exhausted = len(run) < SORT_BATCH_ROWS
+        while not exhausted and len(run) < limit:
+            batch = [(key(row), row) for row in islice(rows, min(SORT_BATCH_ROWS, limit - len(run)))]
+            run += batch
+            exhausted = not batch
+        run.sort(key=operator.itemgetter(0), reverse=reverse)
+        count += len(run)
+        chunk_rows = min(chunk_rows, max(1, limit // SORT_MERGE_FANIN))
+        if exhausted and keep_first and not runs:
+            return runs, count, run, chunk_rows
+        runs.append(_write_run(run, run_dir, chunk_rows))
+        del run
+
+def _sort_range(task):
+    """Process-pool worker: sorts one byte range of a CSV/JSONL file into spilled runs."""
+    path, ext, start, end, columns, descending, memory, run_dir = task
+    key, reverse = _sort_key(columns, descending)
+    with open(path, 'rb') as raw:
+        raw.seek(start)
+        src = io.BufferedReader(_BoundedReader(raw, end), STREAM_BUFFER)
+        runs, count, _, chunk_rows = _sorted_runs(_sort_rows(src, ext), key, reverse, memory, run_dir)
+    return runs, count, chunk_rows
+
+def _merge_runs(runs, reverse, run_dir, chunk_rows, first=()):
+    """Heap-merges sorted runs (plus an in-memory run ahead of them) into one stream.
+
+    More than SORT_MERGE_FANIN runs are first merged in groups of
+    neighbouring runs, so equal keys keep their order.
+    """
+    by_key = operator.itemgetter(0)
+    while len(runs) + bool(first) > SORT_MERGE_FANIN:
+        merged = []
+        for i in range(0, len(runs), SORT_MERGE_FANIN):
+            group = runs[i:i + SORT_MERGE_FANIN]
+            if len(group) > 1:
+                merged.append(_write_run(heapq.merge(*map(_read_run, group), key=by_key, reverse=reverse),
+                                         run_dir, chunk_rows))
+                for path in group:
+                    os.remove(path)
+            else:
+                merged += group
+        runs = merged
+    sources = ([first] if first else []) + [_read_run(path) for path in runs]
+    if len(sources) == 1:
+        return iter(sources[0])
+    return heapq.merge(*sources, key=by_key, reverse=reverse)
+
+def sort_records(src_path, dst_path, by, memory=None, workers=1, indent=4):
+    """Sorts a CSV/JSON/JSONL file by the columns in `by` (see parse_sort_spec).
+
+    Uses about `memory` bytes (default SORT_MEMORY_BYTES) for rows; the
+    rest is spilled to temp files next to dst_path. workers > 1 (or None
+    for one per CPU) sorts byte ranges of a large uncompressed CSV/JSONL
+    file in a process pool, each with an equal share of the budget.
+    dst_path may be src_path. JSON records take dotted names for nested
+    fields. Returns (rows, bytes_written, seconds, spilled runs).
+    """
+    ext = base_ext(src_path)
+    if ext not in RECORD_FORMATS or base_ext(dst_path) != ext:
+        raise ValueError("Sorting works on CSV, JSON and JSONL files and keeps the format")
+    spec = parse_sort_spec(by)
+    memory = memory or SORT_MEMORY_BYTES
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    header, line_end = _csv_header(src_path) if ext == '.csv' else (None, None)
+    columns = [name for name, _ in spec]
+    if header is not None:
+        position = {name: i for i, name in reversed(list(enumerate(header)))}
+        unknown = [name for name in columns if name not in position]
+        if unknown:
+            raise KeyError(", ".join(dict.fromkeys(unknown)))
+        columns = [position[name] for name in columns]
+    descending = [desc for _, desc in spec]
+    key, reverse = _sort_key(columns, descending)
+
+    ensure_parent(dst_path)
+    run_dir = tempfile.mkdtemp(prefix=".sort-", dir=os.path.dirname(os.path.abspath(dst_path)))
+    try:
+        size = os.path.getsize(src_path)
+        if (workers > 1 and ext in INCREMENTAL_SOURCES and not compression_of(src_path)
+                and size >= SORT_PARALLEL_MIN):
+            if ext == '.csv':
+                cuts = csv_record_boundaries(src_path, -(-size // workers))
+            else:
+                cuts = _line_boundaries(src_path, workers)
+            tasks = [(src_path, ext, a, b, columns, descending, memory // workers, run_dir)
+                     for a, b in zip(cuts, cuts[1:])]
+            runs, rows, first, chunk_rows = [], 0, [], SORT_BATCH_ROWS
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                for part_runs, count, part_chunk in pool.map(_sort_range, tasks):
+                    runs += part_runs
+                    rows += count
+                    chunk_rows = min(chunk_rows, part_chunk)
+        else:
+            with open_forge(src_path, 'rb') as src:
+                runs, rows, first, chunk_rows = _sorted_runs(_sort_rows(src, ext, skip_header=True), key, reverse,
+                                                             memory, run_dir, keep_first=True)
+        spilled = len(runs)
+        merged = map(operator.itemgetter(1), _merge_runs(runs, reverse, run_dir, chunk_rows, first))
+        with atomic_write(dst_path, newline='' if ext == '.csv' else None, buffering=STREAM_BUFFER) as dst:
+            if ext == '.csv':
+                writer = csv.writer(dst, lineterminator=line_end)
+                if header:
+                    writer.writerow(header)
+                writer.writerows(merged)
+            else:
+                write_records(merged, dst, ext, indent)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    return rows, os.path.getsize(dst_path), time.perf_counter() - start, spilled
+
+def sorted_name(filename):
+    """Default output name for sort_file: 'a.csv.gz' -> 'a_sorted.csv.gz'."""
+    name, codec = split_codec(filename)
+    base, ext = os.path.splitext(name)
+    return f"{base}_sorted{ext}{codec}"
+
+@instrumented("sort_file")
+def sort_file(filename, by, output=None, memory=None, workers=1):
+    """Writes a forge CSV/JSON/JSONL file sorted by the columns in `by`.
+
+    `by` is "city, age desc" or a list of such names (see parse_sort_spec).
+    The output defaults to sorted_name(filename); pass output=filename to
+    sort in place. See sort_records for `memory` and `workers`.
+    Returns (message, output path).
+    """
+    path = get_file_path(filename)
+    if not os.path.exists(path):
+        return "Error: File not found!", None
+    if base_ext(filename) not in RECORD_FORMATS:
+        return "Error: Sorting works on CSV, JSON and JSONL files!", None
+    output = output or sorted_name(filename)
+    if base_ext(output) != base_ext(filename):
+        return "Error: The sorted file must keep the source format!", None
+    try:
+        new_path = get_file_path(output)
+        read = os.path.getsize(path)
+        rows, written, seconds, spilled = sort_records(path, new_path, by, memory, workers)
+    except KeyError as e:
+        return f"Error: Unknown column(s): {e.args[0]}", None
+    except Exception as e:
+        return f"❌ Error: {str(e)}", None
+    record_io(bytes_read=read, bytes_written=written, rows=rows)
+    how = f"merged from {spilled} spilled runs" if spilled else "sorted in memory"
+    return f"🔀 Sorted into '{output}' ({rate_summary(rows, written, seconds)}, {how})", new_path
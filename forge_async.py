@@ -0,0 +1,130 @@
+# forge_async.py
+"""asyncio front end for file_forge.
+
+Every call runs the blocking file_forge function on one of two bounded
+thread pools, so an event loop never stalls and hundreds of concurrent
+operations share a fixed number of threads:
+
+- the I/O pool handles create/read/append/delete/listing and streaming;
+- the heavy pool handles conversions, so they can't starve quick I/O.
+
+Each call accepts `timeout` (seconds). A timed-out or cancelled call stops
+waiting immediately; work already running on a thread finishes in the
+background, but work still queued is dropped.
+"""
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import file_forge as forge
+
+IO_WORKERS = int(os.environ.get("FORGE_IO_WORKERS", min(32, (os.cpu_count() or 1) + 4)))
+HEAVY_WORKERS = int(os.environ.get("FORGE_HEAVY_WORKERS", os.cpu_count() or 1))
+STREAM_BATCH = 1000
+
+_IO_POOL = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="forge-io")
+_HEAVY_POOL = ThreadPoolExecutor(max_workers=HEAVY_WORKERS, thread_name_prefix="forge-heavy")
+
+
+async def _run(pool, fn, *args, timeout=None, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs)), timeout)
+
+
+# --- OPERATIONS ---
+async def create_file(filename, content, file_type, compression=None, timeout=None):
+    return await _run(_IO_POOL, forge.create_file, filename, content, file_type, compression, timeout=timeout)
+
+async def read_file(filename, use_cache=True, timeout=None):
+    """Whole-file read; prefer iter_records/iter_chunks for big files."""
+    return await _run(_IO_POOL, forge.read_file, filename, use_cache, timeout=timeout)
+
+async def read_page(filename, offset=0, limit=100, timeout=None):
+    return await _run(_IO_POOL, forge.read_page, filename, offset, limit, timeout=timeout)
+
+async def append_to_file(filename, content, batched=True, timeout=None):
+    """Appends through the group-commit AppendService by default."""
+    return await _run(_IO_POOL, forge.append_to_file, filename, content, batched, timeout=timeout)
+
+async def delete_file(filename, timeout=None):
+    return await _run(_IO_POOL, forge.delete_file, filename, timeout=timeout)
+
+async def convert_csv_json(filename, target=None, timeout=None, **kwargs):
+    return await _run(_HEAVY_POOL, forge.convert_csv_json, filename, target, timeout=timeout, **kwargs)
+
+async def query_file(filename, columns=None, where=None, limit=None, timeout=None):
+    return await _run(_IO_POOL, forge.query_file, filename, columns, where, limit, timeout=timeout)
+
+async def profile_file(filename, use_cache=True, timeout=None):
+    return await _run(_HEAVY_POOL, forge.profile_file, filename, use_cache, timeout=timeout)
+
+async def sort_file(filename, by, output=None, memory=None, workers=1, timeout=None):
+    return await _run(_HEAVY_POOL, forge.sort_file, filename, by, output, memory, workers, timeout=timeout)
+
+async def list_all_files(pattern=None, sort_by="name", reverse=False, offset=0, limit=None,
+                         details=False, timeout=None):
+    return await _run(_IO_POOL, forge.list_all_files, pattern, sort_by, reverse, offset, limit,
+                      details, timeout=timeout)
+
+async def count_files(pattern=None, timeout=None):
+    return await _run(_IO_POOL, forge.count_files, pattern, timeout=timeout)
+
+
+# --- STREAMING ---
+async def _iterate(make_iter, batch_size, timeout):
+    """Drives a blocking iterator from the I/O pool, one batch per hop."""
+    it = await _run(_IO_POOL, make_iter, timeout=timeout)
+    pending = None
+    try:
+        while True:
+            pending = _IO_POOL.submit(_take, it, batch_size)
+            batch = await asyncio.wait_for(asyncio.wrap_future(pending), timeout)
+            if not batch:
+                return
+            for item in batch:
+                yield item
+    finally:
+        close = getattr(it, 'close', None)
+        if close is not None and pending is not None and not pending.done():
+            # a timed-out batch is still reading the iterator; closing it now would
+            # raise "generator already executing" in place of the TimeoutError
+            pending.add_done_callback(lambda _: _IO_POOL.submit(close))
+        elif close is not None:
+            await asyncio.get_running_loop().run_in_executor(_IO_POOL, close)
+
+def _take(it, n):
+    batch = []
+    for item in it:
+        batch.append(item)
+        if len(batch) == n:
+            break
+    return batch
+
+def iter_records(filename, batch_size=STREAM_BATCH, timeout=None):
+    """Async iterator over the records of a CSV/JSON/JSONL file.
+
+    `timeout` applies to each batch, not to the whole iteration.
+    """
+    return _iterate(lambda: forge.stream_records(filename), batch_size, timeout)
+
+def iter_files(pattern=None, sort_by="name", reverse=False, batch_size=STREAM_BATCH, timeout=None):
+    """Async iterator over matching forge file names."""
+    return _iterate(lambda: iter(forge.list_all_files(pattern, sort_by, reverse)), batch_size, timeout)
+
+async def iter_chunks(filename, chunk_size=forge.STREAM_BUFFER, timeout=None):
+    """Async iterator over a file's raw bytes, e.g. for a download response."""
+    f = await _run(_IO_POOL, open, forge.get_file_path(filename), 'rb', timeout=timeout)
+    try:
+        while True:
+            chunk = await _run(_IO_POOL, f.read, chunk_size, timeout=timeout)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        f.close()
+
+
+def shutdown(wait=True):
+    """Stops both pools; pending calls are cancelled."""
+    _IO_POOL.shutdown(wait=wait, cancel_futures=True)
+    _HEAVY_POOL.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,617 @@
+# forge_bench.py
+"""Benchmarks for file_forge.
+
+    python forge_bench.py suite --sizes 1MB,100MB --out results.json
+    python forge_bench.py suite --compare baseline.json
+    python forge_bench.py appends
+    python forge_bench.py codecs
+    python forge_bench.py flatten --rows 1000000
+    python forge_bench.py startup --compare startup_baseline.json
+
+`suite` generates synthetic datasets (narrow/wide CSV, nested JSON, JSONL,
+text), runs every file_forge operation and the CLI conversions against
+them, each in a fresh process, and records wall time, throughput and peak
+RSS as JSON. With --compare it flags regressions against a saved run and
+exits with status 1 if there are any.
+
+`appends` compares per-call appends with the group-commit AppendService;
+`codecs` reports disk usage and read/convert speed per compression codec;
+`flatten` compares nested JSON -> CSV flattening with pandas.json_normalize;
+`startup` times cold imports and the first render of app.py, and records
+whether pandas was pulled in at import.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import importlib.util
+import subprocess
+import statistics
+import multiprocessing
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+import file_forge as forge
+
+
+def _run_writers(filename, writers, appends, mode):
+    path = forge.get_file_path(filename)
+
+    def work(n):
+        if mode == "queued":
+            # Fire-and-forget: hand lines to the service, wait once at the end
+            service = forge.append_service()
+            for i in range(appends):
+                service.submit(path, f"writer {n} line {i}".encode(), "text", None)
+            service.flush()
+            return
+        for i in range(appends):
+            forge.append_to_file(filename, f"writer {n} line {i}", batched=mode == "group-commit")
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def bench_appends(writers=8, appends=500, fsync="never"):
+    """Appends/s for per-call writes vs. the group-commit service.
+
+    Every writer thread appends `appends` lines to the same text file:
+    "per-call" opens and writes the file on every call (never fsyncs),
+    "group-commit" waits for each append to be batched and written, and
+    "queued" submits without waiting and flushes once at the end.
+    Returns a list of dicts: mode, appends, seconds, appends/s, batches.
+    """
+    filename = "_bench_appends.txt"
+    results = []
+    service = forge.append_service(fsync=fsync)
+    for mode in ("per-call", "group-commit", "queued"):
+        forge.create_file(filename, "", "Text (.txt)")
+        batches = service.stats["batches"]
+        seconds = _run_writers(filename, writers, appends, mode)
+        total = writers * appends
+        with open(forge.get_file_path(filename)) as f:
+            assert sum(1 for _ in f) == total + 1, "lost or torn appends"
+        results.append({
+            "mode": mode,
+            "appends": total,
+            "seconds": round(seconds, 3),
+            "appends/s": round(total / seconds),
+            "batches": service.stats["batches"] - batches if mode != "per-call" else total,
+        })
+    forge.delete_file(filename)
+    return results
+
+
+# --- SYNTHETIC DATASETS ---
+CITIES = ["Paris", "Rome", "Oslo", "Lima", "Pune", "Kyoto"]
+WIDE_COLUMNS = 100
+
+def _narrow_csv(rng):
+    yield "id,city,score,price,joined,note\n"
+    i = 0
+    while True:
+        yield (f"{i},{rng.choice(CITIES)},{rng.randint(0, 1000)},{rng.random() * 100:.2f},"
+               f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d},note {rng.getrandbits(32):x}\n")
+        i += 1
+
+def _wide_csv(rng):
+    yield ",".join(f"c{n}" for n in range(WIDE_COLUMNS)) + "\n"
+    while True:
+        yield ",".join(str(rng.randint(0, 99999)) if n % 3 else rng.choice(CITIES)
+                       for n in range(WIDE_COLUMNS)) + "\n"
+
+def _nested_record(rng, i):
+    return {
+        "id": i,
+        "user": {"name": f"user{rng.getrandbits(24):x}",
+                 "address": {"city": rng.choice(CITIES), "zip": f"{rng.randint(0, 99999):05d}"}},
+        "tags": [rng.choice(["a", "b", "c", "d"]) for _ in range(rng.randint(0, 4))],
+        "scores": {"math": rng.randint(0, 100), "art": rng.randint(0, 100)},
+        "active": rng.random() < 0.5,
+    }
+
+def _nested_json(rng):
+    i = 0
+    while True:
+        # Same layout as json.dump(records, f, indent=4)
+        record = json.dumps(_nested_record(rng, i), indent=4).replace("\n", "\n    ")
+        yield ("[\n    " if i == 0 else ",\n    ") + record
+        i += 1
+
+def _flat_jsonl(rng):
+    i = 0
+    while True:
+        yield json.dumps({"id": i, "city": rng.choice(CITIES), "score": rng.randint(0, 1000),
+                          "note": f"note {rng.getrandbits(32):x}"}, separators=(',', ':')) + "\n"
+        i += 1
+
+def _text(rng):
+    levels = ["INFO", "WARN", "ERROR", "DEBUG"]
+    i = 0
+    while True:
+        yield f"2024-01-01T00:00:{i % 60:02d} {rng.choice(levels)} worker-{rng.randint(1, 16)} event {rng.getrandbits(40):x}\n"
+        i += 1
+
+# kind -> (extension, line generator, closing text, header lines)
+DATASETS = {
+    "narrow-csv": (".csv", _narrow_csv, "", 1),
+    "wide-csv": (".csv", _wide_csv, "", 1),
+    "nested-json": (".json", _nested_json, "\n]", 0),
+    "jsonl": (".jsonl", _flat_jsonl, "", 0),
+    "text": (".txt", _text, "", 0),
+}
+
+def parse_size(text):
+    """'512KB', '10MB', '2GB' or a plain byte count -> bytes."""
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMG]?B?)\s*', text.upper())
+    if not match:
+        raise ValueError(f"Bad size: {text!r}")
+    unit = {"": 1, "B": 1, "K": 1024, "KB": 1024, "M": 1024 ** 2, "MB": 1024 ** 2,
+            "G": 1024 ** 3, "GB": 1024 ** 3}[match.group(2)]
+    return int(float(match.group(1)) * unit)
+
+def make_dataset(kind, size, path, seed=0):
+    """Writes a synthetic dataset of about `size` bytes. Returns its record count."""
+    ext, lines, closing, header = DATASETS[kind]
+    rng = random.Random(seed)
+    count = 0
+    with open(path, 'w', newline='', buffering=forge.STREAM_BUFFER) as f:
+        for line in lines(rng):
+            f.write(line)
+            count += 1
+            if count % 1000 == 0 and f.tell() >= size:
+                break
+        f.write(closing)
+    return count - header
+
+def make_csv(path, rows=200000, seed=0):
+    """Writes a synthetic narrow CSV with exactly `rows` data rows."""
+    lines = _narrow_csv(random.Random(seed))
+    with open(path, 'w', newline='', buffering=forge.STREAM_BUFFER) as f:
+        for _ in range(rows + 1):
+            f.write(next(lines))
+
+def make_nested_json(path, rows=200000, seed=0):
+    """Writes a synthetic nested JSON array with exactly `rows` records."""
+    lines = _nested_json(random.Random(seed))
+    with open(path, 'w', newline='', buffering=forge.STREAM_BUFFER) as f:
+        for _ in range(rows):
+            f.write(next(lines))
+        f.write("\n]" if rows else "[]")
+
+
+CODEC_LEVELS = [("", None), ("gz", 1), ("gz", 6), ("gz", 9), ("bz2", 1), ("bz2", 9), ("xz", 0), ("xz", 6)]
+
+
+def bench_codecs(rows=100000, levels=CODEC_LEVELS):
+    """Disk size, write, read and CSV->JSON convert time for each codec/level.
+
+    The converted JSON is compressed with the same codec and level.
+    Returns a list of dicts: codec, level, size, ratio, json size and
+    write/read/convert seconds.
+    """
+    plain = forge.get_file_path("_bench_codec.csv")
+    forge.ensure_parent(plain)
+    make_csv(plain, rows)
+    plain_size = os.path.getsize(plain)
+    results = []
+    default_level = forge.COMPRESSION_LEVEL
+    cache_bytes = forge.CONVERSION_CACHE_BYTES
+    forge.CONVERSION_CACHE_BYTES = 0  # the same seeded CSV would be a cache hit on every later run
+    for codec, level in levels:
+        forge.COMPRESSION_LEVEL = level
+        name = "_bench_codec.csv" + (f".{codec}" if codec else "")
+        path = forge.get_file_path(name)
+        start = time.perf_counter()
+        if codec:
+            with open(plain, 'rb') as src, forge.open_forge(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, forge.STREAM_BUFFER)
+            forge.invalidate_listing()
+        write_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        msg, _ = forge.read_file(name, use_cache=False)
+        read_s = time.perf_counter() - start
+        start = time.perf_counter()
+        msg, out_path = forge.convert_csv_json(name)
+        convert_s = time.perf_counter() - start
+
+        size = os.path.getsize(path)
+        results.append({
+            "codec": codec or "none",
+            "level": "-" if level is None else level,
+            "size": forge.human_size(size),
+            "ratio": round(plain_size / size, 2),
+            "json size": forge.human_size(os.path.getsize(out_path)),
+            "write s": round(write_s, 3),
+            "read s": round(read_s, 3),
+            "convert s": round(convert_s, 3),
+        })
+        forge.delete_file(forge.converted_name(name))
+        if codec:
+            forge.delete_file(name)
+    forge.COMPRESSION_LEVEL = default_level
+    forge.CONVERSION_CACHE_BYTES = cache_bytes
+    forge.delete_file("_bench_codec.csv")
+    return results
+
+
+# --- FLATTEN ---
+def _flatten_job(method, src, dst):
+    """One JSON -> CSV flatten in the current (fresh) process: (seconds, peak RSS)."""
+    start = time.perf_counter()
+    if method == "forge":
+        forge.stream_convert(src, dst, '.json', '.csv')
+    else:
+        with open(src) as f:
+            forge.pd.json_normalize(json.load(f)).to_csv(dst, index=False)
+    return time.perf_counter() - start, _peak_rss()
+
+def bench_flatten(rows=1000000, seed=0):
+    """Nested JSON -> CSV: the streaming flattener vs. pandas.json_normalize.
+
+    Each method runs in a freshly spawned process on the same file.
+    Returns a list of dicts: method, rows, seconds, rows/s, peak RSS.
+    """
+    src = forge.get_file_path("_bench_flatten.json")
+    forge.ensure_parent(src)
+    make_nested_json(src, rows, seed)
+    results = []
+    try:
+        for method in ("forge", "json_normalize"):
+            dst = forge.get_file_path(f"_bench_flatten_{method}.csv")
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                seconds, peak = pool.submit(_flatten_job, method, src, dst).result()
+            os.remove(dst)
+            results.append({
+                "method": method,
+                "rows": rows,
+                "seconds": round(seconds, 3),
+                "rows/s": round(rows / seconds),
+                "peak rss": forge.human_size(peak) if peak else "n/a",
+            })
+    finally:
+        os.remove(src)
+    return results
+
+
+# --- SUITE ---
+CREATE_LIMIT = 64 * 1024 * 1024  # create_file takes the content as one string, so bigger files skip it
+_CLI = None
+
+def _cli():
+    """The file-forge.py CLI module (its name isn't importable directly)."""
+    global _CLI
+    if _CLI is None:
+        spec = importlib.util.spec_from_file_location(
+            "file_forge_cli", os.path.join(os.path.dirname(os.path.abspath(__file__)), "file-forge.py"))
+        _CLI = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_CLI)
+    return _CLI
+
+def _append_line(ctx):
+    return {".csv": "1,2,3", ".jsonl": '{"id": -1}', ".txt": "appended line"}[ctx["ext"]]
+
+def _quiet(fn, *args):
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        return fn(*args)
+
+def _created_name(ctx):
+    return "_created_" + ctx["name"]
+
+def _key_column(ctx):
+    return "c1" if ctx["kind"] == "wide-csv" else "id"  # numeric in every dataset
+
+# op -> (extensions it applies to, whole-file op?, function(ctx))
+OPERATIONS = {
+    "read_file": ((".csv", ".json", ".jsonl", ".txt"), True,
+                  lambda c: forge.read_file(c["name"], use_cache=False)),
+    # count_records runs first, so it includes building the row-offset index
+    "count_records": (forge.PAGEABLE, True, lambda c: forge.count_records(c["name"])),
+    "read_page_last": (forge.PAGEABLE, False,
+                       lambda c: forge.read_page(c["name"], max(c["rows"] - 100, 0), 100)),
+    "preview_file": ((".csv", ".json", ".jsonl", ".txt"), False, lambda c: forge.preview_file(c["name"])),
+    "query_first_100": (forge.RECORD_FORMATS, False,
+                        lambda c: forge.query_file(c["name"], None, [(_key_column(c), ">=", 0)], limit=100)),
+    # matches nothing, so the whole file is scanned
+    "query_scan": (forge.RECORD_FORMATS, True,
+                   lambda c: forge.query_file(c["name"], [_key_column(c)], [(_key_column(c), "<", 0)])),
+    "profile_file": (forge.RECORD_FORMATS, True, lambda c: forge.profile_file(c["name"])),
+    "sort_file": (forge.RECORD_FORMATS, True,
+                  lambda c: forge.sort_file(c["name"], _key_column(c) + " desc")),
+    "infer_csv_schema": ((".csv",), False, lambda c: forge.infer_csv_schema(c["path"])),
+    "convert_csv_json": (forge.RECORD_FORMATS, True, lambda c: forge.convert_csv_json(c["name"])),
+    "convert_parallel": ((".csv",), True,
+                         lambda c: forge.convert_csv_json(c["name"], workers=None,
+                                                          chunk_size=max(c["size"] // (4 * (os.cpu_count() or 1)), 1 << 20))),
+    "export_converted": (forge.RECORD_FORMATS, True,
+                         lambda c: forge.export_converted(c["name"])[1].close()),
+    "list_all_files": ((".csv", ".json", ".jsonl", ".txt"), False, lambda c: forge.list_all_files(details=True)),
+    "append_to_file": ((".csv", ".jsonl", ".txt"), False, lambda c: forge.append_to_file(c["name"], _append_line(c))),
+    "create_file": ((".csv", ".txt"), True,
+                    lambda c: forge.create_file(_created_name(c), open(c["path"]).read(),
+                                                "CSV (.csv)" if c["ext"] == ".csv" else "Text (.txt)")),
+    "delete_file": ((".csv", ".txt"), False, lambda c: forge.delete_file(_created_name(c))),
+    "cli_csv_to_json": ((".csv",), True, lambda c: _quiet(_cli().csv_to_json, c["path"], c["path"] + ".cli.json")),
+    "cli_json_to_csv": ((".json",), True, lambda c: _quiet(_cli().json_to_csv, c["path"], c["path"] + ".cli.csv")),
+}
+
+def _peak_rss():
+    """Peak resident set size of this process in bytes (None if unknown)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def _measure(op, ctx):
+    """Runs one operation in the current (fresh) process and times it."""
+    baseline = _peak_rss()
+    error = None
+    start = time.perf_counter()
+    try:
+        result = OPERATIONS[op][2](ctx)
+        status = result[0] if isinstance(result, tuple) else result
+        if isinstance(status, str) and ("Error" in status[:10]):
+            error = status
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    seconds = time.perf_counter() - start
+    peak = _peak_rss()
+    return {"seconds": seconds, "peak_rss": peak,
+            "rss_delta": None if peak is None else max(peak - baseline, 0), "error": error}
+
+def _run_isolated(op, ctx):
+    """_measure in a freshly spawned process, so peak RSS belongs to this op alone."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_measure, op, ctx).result()
+
+def run_suite(kinds, sizes, ops=None, repeat=1, seed=0, log=print):
+    """Generates each dataset and runs every applicable operation on it.
+
+    Returns a list of result dicts (dataset, target_size, bytes, rows, op,
+    seconds, mb_per_s, rows_per_s, peak_rss, rss_delta, error); seconds is
+    the median of `repeat` runs and RSS the maximum.
+    """
+    results = []
+    for kind in kinds:
+        ext = DATASETS[kind][0]
+        for size in sizes:
+            name = f"_bench_{kind}_{size}{ext}"
+            path = forge.get_file_path(name)
+            forge.ensure_parent(path)
+            rows = make_dataset(kind, size, path, seed)
+            forge.invalidate_listing()
+            ctx = {"kind": kind, "name": name, "path": path, "ext": ext, "size": os.path.getsize(path), "rows": rows}
+            log(f"{kind} {forge.human_size(ctx['size'])} ({rows:,} records)")
+            for op, (exts, whole, _) in OPERATIONS.items():
+                if (ops and op not in ops) or ext not in exts:
+                    continue
+                if op in ("create_file", "delete_file") and ctx["size"] > CREATE_LIMIT:
+                    log(f"  {op:<18} skipped above {forge.human_size(CREATE_LIMIT)}")
+                    continue
+                runs = []
+                for _ in range(repeat):
+                    forge.drop_sidecars(path)  # every run starts without index/schema
+                    runs.append(_run_isolated(op, ctx))
+                seconds = sorted(r["seconds"] for r in runs)[len(runs) // 2]
+                peaks = [r["peak_rss"] for r in runs if r["peak_rss"] is not None]
+                deltas = [r["rss_delta"] for r in runs if r["rss_delta"] is not None]
+                entry = {
+                    "dataset": kind, "target_size": size, "bytes": ctx["size"], "rows": rows, "op": op,
+                    "seconds": round(seconds, 4),
+                    "mb_per_s": round(ctx["size"] / 2 ** 20 / seconds, 2) if whole and seconds else None,
+                    "rows_per_s": round(rows / seconds) if whole and seconds else None,
+                    "peak_rss": max(peaks) if peaks else None,
+                    "rss_delta": max(deltas) if deltas else None,
+                    "error": next((r["error"] for r in runs if r["error"]), None),
+                }
+                results.append(entry)
+                log(f"  {op:<18} {seconds:8.3f}s"
+                    + (f" {entry['mb_per_s']:8.1f} MB/s" if entry["mb_per_s"] else " " * 14)
+                    + (f"  peak {forge.human_size(entry['peak_rss'])}" if entry["peak_rss"] else "")
+                    + (f"  ERROR {entry['error']}" if entry["error"] else ""))
+            for leftover in (path, path + ".cli.json", path + ".cli.csv"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            for other in (forge.converted_name(name), forge.sorted_name(name), _created_name(ctx)):
+                if other:
+                    forge.delete_file(other)
+            forge.drop_sidecars(path)
+    return results
+
+def compare_results(results, baseline, threshold=0.10, min_seconds=0.005):
+    """Lines comparing a run against a baseline, plus the regression count.
+
+    An op regresses when it is more than `threshold` (and `min_seconds`)
+    slower, or its peak RSS grows by more than `threshold`, or it now fails.
+    """
+    def key(r):
+        return (r["dataset"], r["target_size"], r["op"])
+
+    old = {key(r): r for r in baseline}
+    lines, regressions = [], 0
+    for r in results:
+        before = old.get(key(r))
+        label = f"{r['dataset']} {forge.human_size(r['target_size'])} {r['op']}"
+        if before is None:
+            lines.append(f"  new        {label}: {r['seconds']:.3f}s")
+            continue
+        flags = []
+        change = r["seconds"] / before["seconds"] - 1 if before["seconds"] else 0.0
+        if change > threshold and r["seconds"] - before["seconds"] > min_seconds:
+            flags.append(f"time +{change:.0%}")
+        if r["peak_rss"] and before.get("peak_rss") and r["peak_rss"] > before["peak_rss"] * (1 + threshold):
+            flags.append(f"rss +{r['peak_rss'] / before['peak_rss'] - 1:.0%}")
+        if r["error"] and not before.get("error"):
+            flags.append("now fails")
+        if flags:
+            regressions += 1
+            status = "REGRESSED"
+        else:
+            status = "improved" if change < -threshold and before["seconds"] - r["seconds"] > min_seconds else "ok"
+        lines.append(f"  {status:<10} {label}: {before['seconds']:.3f}s -> {r['seconds']:.3f}s ({change:+.0%})"
+                     + (f" [{', '.join(flags)}]" if flags else ""))
+    return lines, regressions
+
+
+# --- STARTUP ---
+HERE = os.path.dirname(os.path.abspath(__file__))
+_IMPORT_PROBE = ("import sys, time; start = time.perf_counter(); import {module}; "
+                 "print(time.perf_counter() - start, 'pandas' in sys.modules)")
+_RENDER_PROBE = ("import time; from streamlit.testing.v1 import AppTest; start = time.perf_counter(); "
+                 "at = AppTest.from_file({path!r}, default_timeout=120); at.run(); "
+                 "print(time.perf_counter() - start, bool(at.exception))")
+
+def _probe(code, workdir):
+    """Runs `code` in a fresh interpreter; returns its two printed values."""
+    env = dict(os.environ, PYTHONPATH=HERE + os.pathsep + os.environ.get("PYTHONPATH", ""),
+               FORGE_ROOT=os.path.join(workdir, "forge_files"))
+    out = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=env,
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[-2]), out[-1] == "True"
+
+def bench_startup(repeat=5, workdir=None):
+    """Cold import time of the forge modules and first-render latency of app.py.
+
+    Each sample runs in a fresh interpreter. Returns result dicts in the
+    suite format (dataset "startup"), so they work with compare_results;
+    `pandas` says whether the import pulled pandas in.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="forge-startup-")
+    probes = [(f"import_{m}", _IMPORT_PROBE.format(module=m)) for m in ("file_forge", "forge_async")]
+    probes.append(("first_render", _RENDER_PROBE.format(path=os.path.join(HERE, "app.py"))))
+    results = []
+    for op, code in probes:
+        seconds, flags, error = [], [], None
+        for _ in range(repeat):
+            try:
+                took, flag = _probe(code, workdir)
+            except (subprocess.CalledProcessError, ValueError, IndexError) as e:
+                error = (getattr(e, "stderr", None) or str(e)).strip().splitlines()[-1]
+                break
+            seconds.append(took)
+            flags.append(flag)
+        results.append({
+            "dataset": "startup", "target_size": 0, "bytes": 0, "rows": 0, "op": op,
+            "seconds": round(statistics.median(seconds), 4) if seconds else 0.0,
+            "mb_per_s": None, "rows_per_s": None, "peak_rss": None, "rss_delta": None,
+            # for imports: pandas loaded; for the render: the app raised
+            "pandas" if op.startswith("import") else "exception": any(flags),
+            "error": error,
+        })
+    return results
+
+
+def _write_report(results, out, baseline, threshold):
+    """Saves results with run metadata; compares against `baseline` if given."""
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {out}")
+    if baseline is not None:
+        lines, regressions = compare_results(results, baseline, threshold)
+        print("\n".join(lines))
+        print(f"{regressions} regression(s) beyond {threshold:.0%}")
+        return 1 if regressions else 0
+    return 0
+
+def _load_baseline(path):
+    if not path:
+        return None
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def _print_table(rows):
+    for row in rows:
+        print("  ".join(f"{k}={v}" for k, v in row.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="file_forge benchmarks")
+    sub = parser.add_subparsers(dest="command")
+    suite = sub.add_parser("suite", help="run every operation on synthetic datasets")
+    suite.add_argument("--datasets", default=",".join(DATASETS), help="comma-separated: " + ", ".join(DATASETS))
+    suite.add_argument("--sizes", default="1MB,10MB", help="comma-separated, e.g. 1MB,100MB,2GB")
+    suite.add_argument("--ops", default="", help="comma-separated subset of: " + ", ".join(OPERATIONS))
+    suite.add_argument("--repeat", type=int, default=1)
+    suite.add_argument("--out", default="bench_results.json")
+    suite.add_argument("--compare", metavar="BASELINE", help="results JSON of an earlier run")
+    suite.add_argument("--threshold", type=float, default=0.10, help="relative slowdown that counts as a regression")
+    suite.add_argument("--workdir", help="where datasets are generated (default: a temp dir)")
+    sub.add_parser("appends", help="per-call vs. group-commit appends")
+    sub.add_parser("codecs", help="size and speed per compression codec")
+    flatten = sub.add_parser("flatten", help="nested JSON -> CSV vs. pandas.json_normalize")
+    flatten.add_argument("--rows", type=int, default=1000000)
+    startup = sub.add_parser("startup", help="cold import time and first render of app.py")
+    startup.add_argument("--repeat", type=int, default=5)
+    startup.add_argument("--out", default="startup_results.json")
+    startup.add_argument("--compare", metavar="BASELINE", help="results JSON of an earlier run")
+    startup.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.command == "appends":
+        forge.init_forge()
+        for policy in ("never", "batch"):
+            print(f"fsync={policy}")
+            _print_table(bench_appends(fsync=policy))
+    elif args.command == "codecs":
+        forge.init_forge()
+        _print_table(bench_codecs())
+    elif args.command == "flatten":
+        forge.init_forge()
+        _print_table(bench_flatten(args.rows))
+    elif args.command == "startup":
+        out = os.path.abspath(args.out)
+        baseline = _load_baseline(args.compare)
+        workdir = tempfile.mkdtemp(prefix="forge-startup-")
+        try:
+            results = bench_startup(args.repeat, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        _print_table({"op": r["op"], "seconds": r["seconds"], "error": r["error"]} for r in results)
+        return _write_report(results, out, baseline, args.threshold)
+    elif args.command == "suite":
+        out = os.path.abspath(args.out)
+        baseline = _load_baseline(args.compare)
+        workdir = args.workdir or tempfile.mkdtemp(prefix="forge-bench-")
+        os.makedirs(workdir, exist_ok=True)
+        # spawned workers re-import file_forge, so they pick the root up from the environment
+        os.environ["FORGE_ROOT"] = os.path.join(os.path.abspath(workdir), "forge_files")
+        os.environ["FORGE_CACHE_MB"] = "0"  # time the conversions themselves, not cache hits
+        forge.CONVERSION_CACHE_BYTES = 0
+        forge.init_forge(os.environ["FORGE_ROOT"])
+        os.chdir(workdir)
+        try:
+            results = run_suite(
+                args.datasets.split(","), [parse_size(s) for s in args.sizes.split(",")],
+                ops=set(filter(None, args.ops.split(","))), repeat=args.repeat,
+            )
+        finally:
+            if not args.workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+        return _write_report(results, out, baseline, args.threshold)
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
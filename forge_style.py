@@ -0,0 +1,127 @@
+# forge_style.py
+"""Streamlit theme for app.py, kept out of the app module so it stays short."""
+
+FORGE_CSS = """
+    <style>
+    /* Main background */
+    .stApp {
+        background: radial-gradient(circle at top left, #102316 0, #050908 45%, #020403 100%);
+        color: #E5F7E7;
+        font-family: "Inter", system-ui, -apple-system, BlinkMacSystemFont, sans-serif;
+    }
+
+    /* Sidebar */
+    section[data-testid="stSidebar"] {
+        background: linear-gradient(180deg, #07140B 0%, #040806 100%);
+        border-right: 1px solid #1C3B22;
+    }
+    section[data-testid="stSidebar"] * {
+        color: #E5F7E7 !important;
+    }
+
+    /* Titles */
+    h1, h2, h3 {
+        color: #D5FFE0 !important;
+        text-shadow: 0 0 12px rgba(0, 255, 140, 0.25);
+    }
+
+    /* Card-like markdown containers */
+    div[data-testid="stMarkdownContainer"] {
+        border-radius: 12px;
+    }
+
+    /* General card wrapper using blocks */
+    .forge-card {
+        background: rgba(5, 20, 10, 0.9);
+        border-radius: 14px;
+        padding: 18px 20px;
+        border: 1px solid rgba(46, 204, 113, 0.25);
+        box-shadow:
+            0 0 18px rgba(0, 0, 0, 0.9),
+            0 0 24px rgba(46, 204, 113, 0.08);
+        backdrop-filter: blur(8px);
+        transition: transform 0.18s ease-out,
+                    box-shadow 0.18s ease-out,
+                    border-color 0.18s ease-out;
+    }
+
+    .forge-card:hover {
+        transform: translateY(-3px);
+        box-shadow:
+            0 0 22px rgba(0, 0, 0, 1),
+            0 0 26px rgba(46, 204, 113, 0.18);
+        border-color: rgba(46, 204, 113, 0.5);
+    }
+
+    /* Buttons */
+    button[kind="primary"],
+    .stButton > button {
+        background: linear-gradient(90deg, #16A34A, #22C55E);
+        color: #F0FFF4 !important;
+        font-weight: 600;
+        border-radius: 999px !important;
+        border: 1px solid #4ADE80;
+        box-shadow: 0 0 12px rgba(34, 197, 94, 0.45);
+        transition: transform 0.15s ease-out,
+                    box-shadow 0.15s ease-out,
+                    filter 0.15s ease-out;
+    }
+
+    .stButton > button:hover {
+        transform: translateY(-1px) scale(1.01);
+        filter: brightness(1.05);
+        box-shadow: 0 0 18px rgba(34, 197, 94, 0.7);
+    }
+
+    .stButton > button:active {
+        transform: translateY(0) scale(0.99);
+        box-shadow: 0 0 6px rgba(34, 197, 94, 0.45);
+    }
+
+    /* Inputs */
+    .stTextInput > div > div > input,
+    .stTextArea textarea,
+    .stSelectbox div[data-baseweb="select"] > div {
+        background: rgba(2, 10, 5, 0.9);
+        color: #E5F7E7 !important;
+        border-radius: 10px;
+        border: 1px solid #14532D;
+    }
+
+    .stTextInput > div > div > input:focus,
+    .stTextArea textarea:focus,
+    .stSelectbox div[data-baseweb="select"]:focus-within {
+        border-color: #22C55E !important;
+        box-shadow: 0 0 0 1px #16A34A;
+    }
+
+    /* Upload widget */
+    .stFileUploader {
+        background: rgba(3, 12, 6, 0.9);
+        border-radius: 12px;
+        padding: 10px 10px 6px 10px;
+        border: 1px dashed rgba(34, 197, 94, 0.45);
+    }
+
+    /* Subtle fade-in animation for main container */
+    .forge-fade-in {
+        animation: forgeFade 0.45s ease-out;
+    }
+
+    @keyframes forgeFade {
+        from {
+            opacity: 0;
+            transform: translateY(6px);
+        }
+        to {
+            opacity: 1;
+            transform: translateY(0);
+        }
+    }
+
+    /* Horizontal rule */
+    hr {
+        border-color: rgba(21, 128, 61, 0.4);
+    }
+    </style>
+    """
@@ -0,0 +1,20 @@
+import pytest
+
+import file_forge as forge
+
+
+@pytest.fixture
+def forge_root(tmp_path, monkeypatch):
+    """A fresh forge folder for one test; the previous root comes back afterwards."""
+    monkeypatch.setattr(forge, "WORK_DIR", forge.WORK_DIR)
+    forge.init_forge(str(tmp_path / "forge"))
+    return tmp_path / "forge"
+
+
+@pytest.fixture
+def forge_text(forge_root):
+    """Reads a forge file's text by name."""
+    def read(filename):
+        with open(forge.get_file_path(filename)) as f:
+            return f.read()
+    return read
@@ -0,0 +1,36 @@
+import json
+import threading
+
+import pytest
+
+import file_forge as forge
+
+
+@pytest.fixture
+def service(forge_root):
+    yield forge.append_service(flush_interval=0.005)
+    forge.append_service(flush_interval=forge.APPEND_FLUSH_INTERVAL)
+
+
+def test_group_commit_keeps_every_writers_order(service, forge_text):
+    forge.create_file("log", "", "JSON Lines (.jsonl)")
+    writers, appends = 8, 50
+    results = []
+
+    def write(w):
+        for n in range(appends):
+            results.append(forge.append_to_file("log.jsonl", json.dumps({"w": w, "n": n}), batched=True))
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    records = [json.loads(line) for line in forge_text("log.jsonl").splitlines()]
+    assert all(msg.startswith("✅") for msg in results)
+    assert len(records) == writers * appends
+    for w in range(writers):
+        assert [r["n"] for r in records if r["w"] == w] == list(range(appends))
+    assert service.stats["appends"] == writers * appends
+    assert service.stats["writes"] < service.stats["appends"]  # concurrent appends shared writes
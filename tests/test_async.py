@@ -0,0 +1,26 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import forge_async
+
+
+def test_timed_out_stream_raises_timeout_and_closes_the_iterator_later():
+    closed = threading.Event()
+
+    def slow():
+        try:
+            yield 1
+            time.sleep(0.3)
+            yield 2
+        finally:
+            closed.set()
+
+    async def consume():
+        return [item async for item in forge_async._iterate(slow, 1, 0.1)]
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(consume())
+    assert closed.wait(2)  # once the batch still running on the pool is done
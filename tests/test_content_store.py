@@ -0,0 +1,84 @@
+import os
+import json
+
+import file_forge as forge
+
+
+def test_create_file_over_deduplicated_file_leaves_its_twins_alone(forge_text):
+    forge.create_file("a", "same content", "Text (.txt)")
+    forge.create_file("b", "same content", "Text (.txt)")
+    forge.dedup_forge()
+    digest = forge.file_digest("b.txt")
+    assert os.path.samefile(forge.get_file_path("a.txt"), forge.get_file_path("b.txt"))
+
+    msg, _ = forge.create_file("a", "CHANGED", "Text (.txt)")
+
+    assert msg.startswith("✅")
+    assert forge_text("a.txt") == "CHANGED"
+    assert forge_text("b.txt") == "same content"
+    with open(forge.blob_path(digest)) as f:
+        assert f.read() == "same content"
+
+
+def test_unstreamed_conversion_does_not_overwrite_a_cached_output(forge_text):
+    forge.create_file("x", "x,y\n1,2", "CSV (.csv)")
+    forge.convert_csv_json("x.csv")
+    forge.delete_file("x.json")
+    msg, _ = forge.convert_csv_json("x.csv")
+    assert "cached" in msg  # x.json is now linked to the cache entry
+
+    forge.create_file("x", "x,y\n3,4", "CSV (.csv)")
+    forge.convert_csv_json("x.csv", streaming=False)
+    forge.create_file("x", "x,y\n1,2", "CSV (.csv)")
+    msg, path = forge.convert_csv_json("x.csv")
+
+    assert "cached" in msg
+    with open(path) as f:
+        assert json.load(f) == [{"x": "1", "y": "2"}]
+
+
+def test_oversized_conversion_does_not_flush_the_cache(forge_text, monkeypatch):
+    for name in ("p", "q", "r"):
+        forge.create_file(name, f"id\n{name}", "CSV (.csv)")
+        forge.convert_csv_json(f"{name}.csv")
+    assert forge.conversion_cache_stats()["entries"] == 3
+    monkeypatch.setattr(forge, "CONVERSION_CACHE_BYTES", 1024)
+
+    forge.create_file("big", "id\n" + "\n".join(map(str, range(1000))), "CSV (.csv)")
+    msg, _ = forge.convert_csv_json("big.csv")
+
+    assert msg.startswith("✅")
+    assert forge.conversion_cache_stats()["entries"] == 3
+
+
+def test_cache_keeps_conversions_of_the_same_bytes_in_different_formats_apart(forge_root):
+    content = b'{"a":1}\n{"a":2}\n'
+    for name in ("n.csv", "n.jsonl"):
+        with open(forge.get_file_path(name), "wb") as f:
+            f.write(content)
+    forge.convert_csv_json("n.csv", ".json")
+
+    msg, path = forge.convert_csv_json("n.jsonl", ".json")
+
+    assert "cached" not in msg
+    with open(path) as f:
+        assert json.load(f) == [{"a": 1}, {"a": 2}]
+    forge.clear_conversion_cache()
+    forge.export_converted("n.csv", ".json")[1].close()
+    msg, spool = forge.export_converted("n.jsonl", ".json")
+    with spool:
+        assert "cached" not in msg
+        assert json.load(spool) == [{"a": 1}, {"a": 2}]
+
+
+def test_dedup_keeps_twins_and_their_outputs_up_to_date(forge_root):
+    forge.create_file("a", "id\n1", "CSV (.csv)")
+    forge.convert_csv_json("a.csv")
+    forge.create_file("b", "id\n1", "CSV (.csv)")
+    before = os.stat(forge.get_file_path("a.csv")).st_mtime_ns
+
+    forge.dedup_forge()
+
+    assert os.stat(forge.get_file_path("a.csv")).st_mtime_ns == before
+    _, summary = forge.convert_batch("a.csv")
+    assert summary[0]["status"] == "skipped"
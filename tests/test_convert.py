@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+
+import pytest
+
+import file_forge as forge
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_empty_json_leaves_an_existing_csv_alone(forge_text, incremental):
+    forge.create_file("d", "a,b\n1,2", "CSV (.csv)")
+    before = forge_text("d.csv")
+    forge.create_file("d", "[]", "JSON (.json)")
+
+    msg, path = forge.convert_csv_json("d.json", incremental=incremental)
+
+    assert (msg, path) == ("Error: No records to convert!", None)
+    assert forge_text("d.csv") == before
+
+
+def test_empty_jsonl_source_leaves_an_existing_csv_alone(forge_text):
+    forge.create_file("e", "a,b\n1,2", "CSV (.csv)")
+    before = forge_text("e.csv")
+    forge.create_file("e", "", "JSON Lines (.jsonl)")
+
+    msg, _ = forge.convert_csv_json("e.jsonl", target=".csv", incremental=True)
+
+    assert msg == "Error: No records to convert!"
+    assert forge_text("e.csv") == before
+
+
+def test_process_batch_converts_in_the_current_root_under_spawn(forge_root, forge_text):
+    forge.create_file("p", "a,b\n1,2", "CSV (.csv)")
+    method = multiprocessing.get_start_method()
+    multiprocessing.set_start_method("spawn", force=True)
+    try:
+        _, summary = forge.convert_batch(["p.csv"], workers=1, use_processes=True)
+    finally:
+        multiprocessing.set_start_method(method, force=True)
+
+    assert summary[0]["status"] == "converted", summary[0]["message"]
+    assert '"a": "1"' in forge_text("p.json")
+
+
+def test_parallel_csv_to_json_matches_serial_across_quoted_newlines(tmp_path):
+    rows = "".join(f'{i},"line one\nline ""{i}""\nline three",x{i}\n' for i in range(40))
+    src = tmp_path / "q.csv"
+    src.write_text("id,note,tag\n" + rows)
+
+    forge.stream_csv_to_json(str(src), str(tmp_path / "serial.json"))
+    count, _, _ = forge.parallel_csv_to_json(str(src), str(tmp_path / "parallel.json"), workers=2, chunk_size=64)
+
+    assert count == 40
+    assert (tmp_path / "parallel.json").read_bytes() == (tmp_path / "serial.json").read_bytes()
+    cuts = forge.csv_record_boundaries(str(src), 64)
+    assert len(cuts) > 3  # really split into several ranges, each ending after a whole record
+    data = src.read_bytes()
+    assert all(data[:cut].endswith(b"\n") and data[:cut].count(b'"') % 2 == 0 for cut in cuts)
+
+
+@pytest.mark.parametrize("source, content, extra, target", [
+    ("c.csv", "a,b\n1,x\n2,y\n", "3,z\n4,w", ".json"),
+    ("c.csv", "a,b\n1,x\n2,y\n", "3,z\n4,w", ".jsonl"),
+    ("j.jsonl", '{"a": 1}\n{"a": 2, "b": {"c": 3}}\n', '{"a": 3}\n{"b": {"c": 4}}', ".csv"),
+    ("j.jsonl", '{"a": 1}\n{"a": 2, "b": {"c": 3}}\n', '{"a": 3}\n{"b": {"c": 4}}', ".json"),
+])
+def test_checkpoint_resumes_after_an_append(forge_root, source, content, extra, target):
+    src = forge.get_file_path(source)
+    with open(src, "w") as f:
+        f.write(content)
+    out = str(forge_root / ("out" + target))
+    src_ext = forge.base_ext(source)
+    assert forge.convert_incremental(src, out, src_ext, target)[4]  # no checkpoint yet: full
+
+    size = os.path.getsize(src)
+    forge.append_to_file(source, extra)
+    rows, bytes_read, _, _, full = forge.convert_incremental(src, out, src_ext, target)
+
+    assert (full, rows, bytes_read) == (False, 2, os.path.getsize(src) - size)
+    fresh = str(forge_root / ("fresh" + target))
+    forge.convert_incremental(src, fresh, src_ext, target)
+    with open(out, "rb") as resumed, open(fresh, "rb") as whole:
+        assert resumed.read() == whole.read()
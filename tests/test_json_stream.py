@@ -0,0 +1,27 @@
+import io
+
+import pytest
+
+import file_forge as forge
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4096])
+@pytest.mark.parametrize("text, bad, message", [
+    ('[{"n": "été"}, {"n": 1} x]', "x]", "Expecting ',' or ']'"),
+    ('["é", {"a": tru}]', "tru}", "Expecting value"),
+    ('["ü", 2,]', "]", "Trailing comma"),
+    ('["é"] 1', "1", "Extra data"),
+])
+def test_error_offsets_are_bytes_into_the_source(text, bad, message, chunk_size):
+    data = text.encode("utf-8")
+    with pytest.raises(forge.JSONStreamError, match=message) as error:
+        list(forge.iter_json_array(io.BytesIO(data), chunk_size))
+    assert error.value.offset == data.rindex(bad.encode("utf-8"))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4096])
+def test_invalid_utf8_offset(chunk_size):
+    data = b'["ok", "\xff"]'
+    with pytest.raises(forge.JSONStreamError, match="Invalid UTF-8") as error:
+        list(forge.iter_json_array(io.BytesIO(data), chunk_size))
+    assert error.value.offset == data.index(b"\xff")
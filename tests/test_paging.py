@@ -0,0 +1,29 @@
+import os
+
+import file_forge as forge
+
+
+def test_append_builds_no_index_for_a_file_never_paged(forge_root):
+    _, path = forge.create_file("log", "one\ntwo\n", "Text (.txt)")
+    forge.append_to_file("log.txt", "three")
+    assert not os.path.exists(forge.sidecar_path(path, "idx"))
+
+
+def test_append_extends_an_existing_index(forge_root):
+    _, path = forge.create_file("log", "one\ntwo\n", "Text (.txt)")
+    idx = forge.sidecar_path(path, "idx")
+    forge.read_page("log.txt", 0, 10)
+    built = os.path.getsize(idx)
+
+    forge.append_to_file("log.txt", "three\nfour")
+
+    assert os.path.getsize(idx) > built  # new row offsets were appended, not rebuilt
+    with open(idx, "rb") as f:
+        extended = f.read()
+    forge.clear_read_cache()
+    pages = [forge.read_page("log.txt", offset, 2) for offset in range(0, 6, 2)]
+    os.remove(idx)
+    forge.clear_read_cache()
+    assert pages == [forge.read_page("log.txt", offset, 2) for offset in range(0, 6, 2)]
+    with open(idx, "rb") as f:
+        assert f.read()[-16:] == extended[-16:]  # same last two row offsets as a fresh build
@@ -0,0 +1,14 @@
+import file_forge as forge
+
+
+def test_profile_after_append_matches_a_full_recompute(forge_root):
+    rows = "".join(f"{i},c{i % 3}\n" for i in range(2000))  # enough ids to evict top-value counters
+    forge.create_file("ids", "id,city\n" + rows, "CSV (.csv)")
+    forge.profile_file("ids.csv")
+    forge.append_to_file("ids.csv", "99999,c1\n2000,c2")
+
+    msg, cached = forge.profile_file("ids.csv")
+    assert "appended rows" in msg
+    assert cached == forge.profile_file("ids.csv", use_cache=False)[1]
+    assert cached["rows"] == 2002
+    assert cached["columns"][0]["top"] == []  # every id is distinct
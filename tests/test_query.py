@@ -0,0 +1,18 @@
+import pytest
+
+import file_forge as forge
+
+
+def test_parse_where_keeps_and_inside_quoted_values():
+    assert forge.parse_where("band == 'Simon and Garfunkel' and year >= 1970") == [
+        ("band", "==", "Simon and Garfunkel"), ("year", ">=", 1970)]
+
+
+def test_parse_where_keeps_commas_inside_quoted_in_values():
+    assert forge.parse_where('name in "Smith, J", Lee') == [("name", "in", ["Smith, J", "Lee"])]
+
+
+@pytest.mark.parametrize("text", ["age < 100 and", "AND age > 1", "age > 1 and and city == Paris"])
+def test_parse_where_rejects_a_dangling_and(text):
+    with pytest.raises(ValueError, match="'and' needs a condition on both sides"):
+        forge.parse_where(text)
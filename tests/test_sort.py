@@ -0,0 +1,25 @@
+import csv
+
+import pytest
+
+import file_forge as forge
+
+
+@pytest.fixture
+def tiny_runs(monkeypatch):
+    """Runs of 50 rows merged 4 at a time, so a small file spills and merges in passes."""
+    monkeypatch.setattr(forge, "SORT_BATCH_ROWS", 50)
+    monkeypatch.setattr(forge, "SORT_MERGE_FANIN", 4)
+
+
+def test_mixed_direction_sort_after_spilling(forge_root, forge_text, tiny_runs):
+    cities = ["Paris", "Oslo", "", "Lima", "oslo"]
+    rows = [[str(i), cities[i * 7 % 5], "" if i % 11 == 0 else str(i * 37 % 90)] for i in range(1000)]
+    forge.create_file("people", "id,city,age\n" + "".join(",".join(row) + "\n" for row in rows), "CSV (.csv)")
+
+    msg, _ = forge.sort_file("people.csv", "city, age desc", memory=1)
+
+    assert "spilled runs" in msg
+    by_age = sorted(rows, key=lambda row: (row[2] == "", -int(row[2] or 0)))  # descending, empty last
+    expected = sorted(by_age, key=lambda row: (row[1] == "", row[1]))  # stable: ties keep age order
+    assert list(csv.reader(forge_text("people_sorted.csv").splitlines()))[1:] == expected
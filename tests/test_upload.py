@@ -0,0 +1,27 @@
+import gzip
+import io
+import json
+import os
+
+import file_forge as forge
+
+
+def test_export_upload_converts_without_storing(forge_root):
+    forge.create_file("people", "name\nold", "CSV (.csv)")
+
+    msg, spool = forge.export_upload(io.BytesIO(b"name,age\nAda,36\n"), "people.csv")
+
+    with spool:
+        assert json.load(spool) == [{"name": "Ada", "age": "36"}]
+    assert msg.startswith("✅")
+    assert os.listdir(forge_root) == ["people.csv"]
+
+
+def test_export_upload_reads_compressed_uploads(forge_root):
+    upload = io.BytesIO(gzip.compress(b'{"a": {"b": 1}}\n'))
+
+    msg, spool = forge.export_upload(upload, "events.jsonl.gz", ".csv")
+
+    with spool:
+        assert spool.read().decode() == "a.b\r\n1\r\n"
+    assert forge.download_name("events.jsonl.gz", ".csv") == "events.csv"